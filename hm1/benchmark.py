@@ -0,0 +1,96 @@
+import argparse
+import ast
+import importlib.util
+import os
+import time
+import uuid
+
+import networkx as nx
+
+from draw_ast import GraphVisitor
+
+MODULES = (
+    'argparse',
+    'inspect',
+    'typing',
+    'pydoc',
+    'turtle',
+    'email._header_value_parser',
+)
+REPEAT = 3
+
+
+class UUIDGraphVisitor(GraphVisitor):
+    # Previous implementation: random UUID ids, one graph insert per item
+    def __init__(self) -> None:
+        super().__init__()
+        self._graph = nx.DiGraph(**self.graph_attributes)
+
+    def _add_edge(
+        self, src_node_id: uuid.UUID, label: str, *dst_nodes: ast.AST,
+    ) -> None:
+        dst_node_ids = [self.visit(dst_node) for dst_node in dst_nodes]
+        for dst_node_id in dst_node_ids:
+            if dst_node_id is not None:
+                self._graph.add_edge(src_node_id, dst_node_id, label=label)
+
+    def _add_node(self, label: str, node: ast.AST) -> uuid.UUID:
+        node_id = uuid.uuid4()
+        self._graph.add_node(
+            node_id,
+            label=label,
+            style='filled',
+            fillcolor=self._get_color(node),
+        )
+        return node_id
+
+
+def get_module_tree(module_name: str) -> ast.AST:
+    spec = importlib.util.find_spec(module_name)
+    with open(spec.origin) as code_file:
+        return ast.parse(code_file.read())
+
+
+def measure(
+    visitor_type: type[GraphVisitor], tree: ast.AST,
+) -> tuple[int, float]:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        visitor = visitor_type()
+        visitor.visit(tree)
+        n_nodes = visitor.graph.number_of_nodes()
+        timings.append(time.perf_counter() - start)
+    return n_nodes, min(timings)
+
+
+def main(module_names: list[str], output_path: str) -> None:
+    lines = []
+    for module_name in module_names:
+        tree = get_module_tree(module_name)
+        for visitor_type in (UUIDGraphVisitor, GraphVisitor):
+            n_nodes, timing = measure(visitor_type, tree)
+            lines.append(
+                '{0}: visitor={1}, nodes={2}, Δtime={3:.5f}, nodes/s={4:.0f}'.format(
+                    module_name,
+                    visitor_type.__name__,
+                    n_nodes,
+                    timing,
+                    n_nodes / timing,
+                ),
+            )
+            print(lines[-1])
+
+    with open(output_path, 'w') as output_file:
+        output_file.write('\n'.join(lines))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    parser.add_argument(
+        '--output-path', default=os.path.join('artifacts', 'benchmark.txt'),
+    )
+    args = parser.parse_args()
+
+    main(args.modules, args.output_path)
@@ -0,0 +1,227 @@
+import argparse
+import ast
+import collections
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Iterator
+
+import networkx as nx
+
+from draw_ast import GraphVisitor, render_graph
+from graph_cache import DEFAULT_MAX_BYTES, GraphCache
+
+CHUNKS_PER_WORKER = 8
+MAX_CHUNK_SIZE = 256
+SKIPPED_DIRS = {'__pycache__', 'node_modules', 'venv'}
+
+
+def find_sources(root: str) -> list[str]:
+    sources = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(
+            dir_name for dir_name in dir_names
+            if not dir_name.startswith('.') and dir_name not in SKIPPED_DIRS
+        )
+        sources.extend(
+            os.path.join(dir_path, file_name)
+            for file_name in sorted(file_names)
+            if file_name.endswith('.py')
+        )
+    return sources
+
+
+def get_chunk_size(n_files: int, n_workers: int) -> int:
+    chunk_size = n_files // (n_workers * CHUNKS_PER_WORKER)
+    return max(1, min(chunk_size, MAX_CHUNK_SIZE))
+
+
+def process_file(
+    path: str,
+    root: str,
+    color_map: dict[str, str] | None = None,
+    render_dir: str | None = None,
+    keep_graph: bool = False,
+    cache_dir: str | None = None,
+) -> dict[str, Any]:
+    relative_path = os.path.relpath(path, root)
+    result: dict[str, Any] = {'path': relative_path}
+    try:
+        with open(path, 'rb') as code_file:
+            source = code_file.read()
+    except OSError as error:
+        result['error'] = '{0}: {1}'.format(type(error).__name__, error)
+        return result
+
+    visitor = GraphVisitor(color_map)
+    cache = None if cache_dir is None else GraphCache(cache_dir)
+    entry = None
+    if cache is not None:
+        key = cache.get_key(source, {'color_map': visitor.color_map})
+        entry = cache.load_graph(key)
+        result['cache'] = {'graph': 'miss' if entry is None else 'hit'}
+
+    if entry is not None:
+        graph, node_types = entry
+    else:
+        # Deeply nested generated code exhausts the recursion of the parser
+        # or the visitor, it is reported like a syntax error
+        try:
+            ast_object = ast.parse(source, filename=path)
+            visitor.visit(ast_object)
+        except (
+            SyntaxError, ValueError, RecursionError, MemoryError,
+        ) as error:
+            result['error'] = '{0}: {1}'.format(type(error).__name__, error)
+            return result
+        graph = visitor.graph
+        node_types = collections.Counter(visitor.node_types)
+        if cache is not None:
+            cache.save_graph(key, graph, node_types)
+
+    result['n_nodes'] = graph.number_of_nodes()
+    result['n_edges'] = graph.number_of_edges()
+    result['node_types'] = node_types
+    if render_dir is not None:
+        image_path = os.path.join(render_dir, relative_path + '.png')
+        os.makedirs(os.path.dirname(image_path), exist_ok=True)
+        # Layout is the slowest step, reuse the image of unchanged sources
+        if cache is not None and cache.load_image(key, image_path):
+            result['cache']['image'] = 'hit'
+        else:
+            render_graph(graph, image_path)
+            if cache is not None:
+                cache.save_image(key, image_path)
+                result['cache']['image'] = 'miss'
+        result['image_path'] = image_path
+    if keep_graph:
+        result['graph'] = (
+            list(graph.nodes(data=True)), list(graph.edges(data=True)),
+        )
+    return result
+
+
+def build_graphs(
+    root: str,
+    *,
+    n_workers: int | None = None,
+    chunk_size: int | None = None,
+    color_map: dict[str, str] | None = None,
+    render_dir: str | None = None,
+    keep_graph: bool = False,
+    cache_dir: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    sources = find_sources(root)
+    n_workers = n_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = get_chunk_size(len(sources), n_workers)
+    worker = partial(
+        process_file,
+        root=root,
+        color_map=color_map,
+        render_dir=render_dir,
+        keep_graph=keep_graph,
+        cache_dir=cache_dir,
+    )
+    if n_workers == 1:
+        yield from map(worker, sources)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        yield from pool.map(worker, sources, chunksize=chunk_size)
+
+
+def merge_results(
+    results: Iterator[dict[str, Any]],
+) -> tuple[dict[str, Any], nx.DiGraph]:
+    summary: dict[str, Any] = {
+        'n_files': 0,
+        'n_nodes': 0,
+        'n_edges': 0,
+        'node_types': collections.Counter(),
+        'errors': {},
+        'cache': collections.Counter(),
+        'files': [],
+    }
+    merged_graph = nx.DiGraph()
+    for file_idx, result in enumerate(results):
+        summary['n_files'] += 1
+        for kind, status in result.get('cache', {}).items():
+            summary['cache']['{0}_{1}'.format(kind, status)] += 1
+        if 'error' in result:
+            summary['errors'][result['path']] = result['error']
+            continue
+        summary['n_nodes'] += result['n_nodes']
+        summary['n_edges'] += result['n_edges']
+        summary['node_types'].update(result['node_types'])
+        graph = result.pop('graph', None)
+        if graph is not None:
+            nodes, edges = graph
+            merged_graph.add_nodes_from(
+                ((file_idx, node_id), data) for node_id, data in nodes
+            )
+            merged_graph.add_edges_from(
+                ((file_idx, src), (file_idx, dst), data)
+                for src, dst, data in edges
+            )
+        summary['files'].append(result)
+    return summary, merged_graph
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('root')
+    parser.add_argument('--n-workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=None)
+    parser.add_argument('--render-dir', default=None)
+    parser.add_argument(
+        '--output-path', default=os.path.join('artifacts', 'graphs.json'),
+    )
+    parser.add_argument('--graph-path', default=None)
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument(
+        '--cache-max-bytes', type=int, default=DEFAULT_MAX_BYTES,
+    )
+    args = parser.parse_args()
+
+    results = build_graphs(
+        args.root,
+        n_workers=args.n_workers,
+        chunk_size=args.chunk_size,
+        render_dir=args.render_dir,
+        keep_graph=args.graph_path is not None,
+        cache_dir=args.cache_dir,
+    )
+    summary, merged_graph = merge_results(results)
+    if args.cache_dir is not None:
+        # Evicting once in the parent keeps workers from racing on deletes
+        cache = GraphCache(args.cache_dir, args.cache_max_bytes)
+        summary['cache']['evictions'] = cache.evict()
+
+    with open(args.output_path, 'w') as output_file:
+        json.dump(summary, output_file, indent=2)
+    if args.graph_path is not None:
+        nx.write_graphml(
+            nx.convert_node_labels_to_integers(merged_graph), args.graph_path,
+        )
+    print(
+        'Processed {0} files: nodes={1}, edges={2}, errors={3}'.format(
+            summary['n_files'],
+            summary['n_nodes'],
+            summary['n_edges'],
+            len(summary['errors']),
+        ),
+    )
+    if args.cache_dir is not None:
+        print(
+            'Cache: {0}'.format(
+                ', '.join(
+                    '{0}={1}'.format(name, count)
+                    for name, count in sorted(summary['cache'].items())
+                ),
+            ),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,28 @@
 import ast
-import uuid
-from typing import Any
+import collections
+import itertools
+from typing import TYPE_CHECKING, Any, NamedTuple
 
-import networkx as nx
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+OPERATOR_TYPES = (ast.operator, ast.boolop, ast.cmpop, ast.unaryop)
+# The dot layout is superlinear, larger graphs fall back to sfdp
+DOT_MAX_NODES = 2000
+
+
+class TreeStats(NamedTuple):
+    node_types: collections.Counter
+    depths: collections.Counter
+    fan_outs: collections.Counter
+    subtree_sizes: list[int]
 
 
 class GraphVisitor(ast.NodeVisitor):
-    def __init__(self, user_color_map: dict | None = None) -> None:
+    def __init__(
+        self, user_color_map: dict | None = None, build_graph: bool = True,
+    ) -> None:
         super().__init__()
         self.color_map = {
             'Assign': 'lightpink',
@@ -21,100 +37,215 @@ class GraphVisitor(ast.NodeVisitor):
         }
         if user_color_map is not None:
             self.color_map.update(user_color_map)
-        self.graph = nx.DiGraph()
-        self.graph.graph['node'] = {'shape': 'rectangle'}
+        self.graph_attributes = {'node': {'shape': 'rectangle'}}
+        self.nodes: list[tuple[int, dict[str, str]]] = []
+        self.edges: list[tuple[int, int, dict[str, str]]] = []
+        self._node_ids = itertools.count()
+        self._graph: 'nx.DiGraph | None' = None
+        self._n_flushed = (0, 0)
+        self.build_graph = build_graph
+        self.node_types: list[str] = []
+        self.node_depths: list[int] = []
+        self.fan_outs: list[int] = []
+        self._depth = 0
+
+    @property
+    def graph(self) -> 'nx.DiGraph':
+        self.flush()
+        return self._graph
+
+    @property
+    def stats(self) -> TreeStats:
+        # Ids are assigned in pre-order, so subtrees are contiguous id ranges
+        subtree_sizes = [0] * len(self.fan_outs)
+        stack: list[int] = []
+        for node_id in reversed(range(len(self.fan_outs))):
+            size = 1
+            for _ in range(self.fan_outs[node_id]):
+                size += stack.pop()
+            subtree_sizes[node_id] = size
+            stack.append(size)
+        return TreeStats(
+            node_types=collections.Counter(self.node_types),
+            depths=collections.Counter(self.node_depths),
+            fan_outs=collections.Counter(self.fan_outs),
+            subtree_sizes=subtree_sizes,
+        )
+
+    def flush(self) -> None:
+        # NetworkX is imported and the graph is built only on demand
+        import networkx as nx
+
+        if self._graph is None:
+            self._graph = nx.DiGraph(**self.graph_attributes)
+        n_nodes, n_edges = self._n_flushed
+        self._graph.add_nodes_from(itertools.islice(self.nodes, n_nodes, None))
+        self._graph.add_edges_from(itertools.islice(self.edges, n_edges, None))
+        self._n_flushed = (len(self.nodes), len(self.edges))
 
     def draw_graph(self, output_path: str) -> None:
-        agraph = nx.drawing.nx_agraph.to_agraph(self.graph)
-        agraph.layout('dot')
-        agraph.draw(output_path)
+        render_graph(self.graph, output_path)
 
     def visit_Add(self, node: ast.Add) -> str:
         return '+'
 
-    def visit_Assign(self, node: ast.Assign) -> uuid.UUID:
-        node_id = self._add_node('assign', self._get_color(node))
+    def visit_Assign(self, node: ast.Assign) -> int:
+        node_id = self._add_node('assign', node)
         self._add_edge(node_id, 'target', *node.targets)
         self._add_edge(node_id, 'value', node.value)
         return node_id
 
-    def visit_BinOp(self, node: ast.BinOp) -> uuid.UUID:
+    def visit_BinOp(self, node: ast.BinOp) -> int:
         node_id = self._add_node(
-            'operation: {0}'.format(self.visit(node.op)),
-            self._get_color(node),
+            'operation: {0}'.format(self._get_operator(node.op)),
+            node,
         )
         self._add_edge(node_id, 'left', node.left)
         self._add_edge(node_id, 'right', node.right)
         return node_id
 
-    def visit_Call(self, node: ast.Call) -> uuid.UUID:
-        node_id = self._add_node('call', self._get_color(node))
+    def visit_Call(self, node: ast.Call) -> int:
+        node_id = self._add_node('call', node)
         self._add_edge(node_id, 'func', node.func)
         self._add_edge(node_id, '*args', *node.args)
         self._add_edge(node_id, '**kwargs', *node.keywords)
         return node_id
 
-    def visit_Constant(self, node: ast.Constant) -> uuid.UUID:
+    def visit_Constant(self, node: ast.Constant) -> int:
         return self._add_node(
             'constant\nvalue: {0}'.format(node.value),
-            self._get_color(node),
+            node,
         )
 
     def visit_Expr(self, node: ast.Expr) -> Any:
         return self.visit(node.value)
 
-    def visit_For(self, node: ast.For) -> uuid.UUID:
-        node_id = self._add_node('for', self._get_color(node))
+    def visit_For(self, node: ast.For) -> int:
+        node_id = self._add_node('for', node)
         self._add_edge(node_id, 'target', node.target)
         self._add_edge(node_id, 'iter', node.iter)
         self._add_edge(node_id, 'body', *node.body)
         return node_id
 
-    def visit_FunctionDef(self, node: ast.FunctionDef) -> uuid.UUID:
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> int:
         node_id = self._add_node(
             'function\nname: {0}'.format(node.name),
-            self._get_color(node),
+            node,
         )
         self._add_edge(node_id, 'body', *node.body)
         return node_id
 
-    def visit_Name(self, node: ast.Name) -> uuid.UUID:
+    def visit_Module(self, node: ast.Module) -> None:
+        for statement in node.body:
+            self.visit(statement)
+
+    def visit_Name(self, node: ast.Name) -> int:
         return self._add_node(
             'variable\nname: {0}'.format(node.id),
-            self._get_color(node),
+            node,
         )
 
-    def visit_Tuple(self, node: ast.Tuple) -> uuid.UUID:
-        node_id = self._add_node('tuple', self._get_color(node))
+    def visit_Tuple(self, node: ast.Tuple) -> int:
+        node_id = self._add_node('tuple', node)
         self._add_edge(node_id, 'item', *node.elts)
         return node_id
 
-    def visit_Yield(self, node: ast.Yield) -> uuid.UUID:
-        node_id = self._add_node('yield', self._get_color(node))
+    def visit_Yield(self, node: ast.Yield) -> int:
+        node_id = self._add_node('yield', node)
         if node.value is not None:
             self._add_edge(node_id, 'value', node.value)
         return node_id
 
+    def generic_visit(self, node: ast.AST) -> int:
+        label_lines = [type(node).__name__.lower()]
+        children = []
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                operators = [
+                    self._get_operator(item) for item in value
+                    if isinstance(item, OPERATOR_TYPES)
+                ]
+                if operators:
+                    label_lines.append(
+                        '{0}: {1}'.format(field, ', '.join(operators)),
+                    )
+                value = [
+                    item for item in value
+                    if isinstance(item, ast.AST)
+                    and not isinstance(item, OPERATOR_TYPES)
+                ]
+                if value:
+                    children.append((field, value))
+            elif isinstance(value, OPERATOR_TYPES):
+                label_lines.append(
+                    '{0}: {1}'.format(field, self._get_operator(value)),
+                )
+            elif isinstance(value, ast.AST):
+                if not isinstance(value, ast.expr_context):
+                    children.append((field, [value]))
+            elif value is not None:
+                label_lines.append('{0}: {1}'.format(field, value))
+
+        node_id = self._add_node('\n'.join(label_lines), node)
+        for field, child_nodes in children:
+            self._add_edge(node_id, field, *child_nodes)
+        return node_id
+
     def _add_edge(
-        self, src_node_id: uuid.UUID, label: str, *dst_nodes: ast.AST,
+        self, src_node_id: int, label: str, *dst_nodes: ast.AST,
     ) -> None:
+        self._depth += 1
         dst_node_ids = [self.visit(dst_node) for dst_node in dst_nodes]
+        self._depth -= 1
+        attributes = {'label': label}
         for dst_node_id in dst_node_ids:
             if dst_node_id is not None:
-                self.graph.add_edge(src_node_id, dst_node_id, label=label)
+                self.fan_outs[src_node_id] += 1
+                if self.build_graph:
+                    self.edges.append((src_node_id, dst_node_id, attributes))
 
-    def _add_node(self, label: str, color: str) -> uuid.UUID:
-        node_id = uuid.uuid4()
-        self.graph.add_node(
-            node_id, label=label, style='filled', fillcolor=color,
-        )
+    def _add_node(self, label: str, node: ast.AST) -> int:
+        node_id = next(self._node_ids)
+        node_type = type(node).__name__
+        self.node_types.append(node_type)
+        self.node_depths.append(self._depth)
+        self.fan_outs.append(0)
+        if self.build_graph:
+            self.nodes.append(
+                (
+                    node_id,
+                    {
+                        'label': label,
+                        'style': 'filled',
+                        'fillcolor': self.color_map.get(node_type, 'white'),
+                    },
+                ),
+            )
         return node_id
 
+    def _get_operator(self, node: ast.AST) -> str:
+        visitor = getattr(self, 'visit_{0}'.format(type(node).__name__), None)
+        if visitor is not None:
+            return visitor(node)
+        return type(node).__name__
+
     def _get_color(self, node):
         node_type = type(node).__name__
         return self.color_map.get(node_type, 'white')
 
 
+def get_engine(n_nodes: int) -> str:
+    return 'dot' if n_nodes <= DOT_MAX_NODES else 'sfdp'
+
+
+def render_graph(graph: 'nx.DiGraph', output_path: str) -> None:
+    import networkx as nx
+
+    agraph = nx.drawing.nx_agraph.to_agraph(graph)
+    agraph.layout(get_engine(graph.number_of_nodes()))
+    agraph.draw(output_path)
+
+
 if __name__ == '__main__':
     with open('fib.py') as code_file:
         ast_object = ast.parse(code_file.read())
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any
+
+import networkx as nx
+
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+GRAPH_SUFFIX = '.graph.json'
+IMAGE_SUFFIX = '.png'
+
+
+class GraphCache(object):
+    def __init__(
+        self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_key(self, source: bytes, config: dict[str, Any]) -> str:
+        digest = hashlib.sha256()
+        digest.update(
+            json.dumps(
+                {'version': CACHE_VERSION, 'config': config}, sort_keys=True,
+            ).encode(),
+        )
+        digest.update(source)
+        return digest.hexdigest()
+
+    def load_graph(
+        self, key: str,
+    ) -> tuple[nx.DiGraph, dict[str, int]] | None:
+        path = self._get_path(key, GRAPH_SUFFIX)
+        try:
+            with open(path) as graph_file:
+                data = json.load(graph_file)
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        graph = nx.DiGraph(**data['graph'])
+        graph.add_nodes_from(data['nodes'])
+        graph.add_edges_from(data['edges'])
+        return graph, data['node_types']
+
+    def save_graph(
+        self, key: str, graph: nx.DiGraph, node_types: dict[str, int],
+    ) -> None:
+        # Node types are stored with the graph, labels do not contain them
+        data = {
+            'graph': graph.graph,
+            'nodes': list(graph.nodes(data=True)),
+            'edges': list(graph.edges(data=True)),
+            'node_types': node_types,
+        }
+        path = self._get_path(key, GRAPH_SUFFIX)
+        with _AtomicFile(path, 'w') as graph_file:
+            json.dump(data, graph_file)
+
+    def load_image(self, key: str, output_path: str) -> bool:
+        path = self._get_path(key, IMAGE_SUFFIX)
+        if not os.path.exists(path):
+            return False
+        self._touch(path)
+        shutil.copyfile(path, output_path)
+        return True
+
+    def save_image(self, key: str, image_path: str) -> None:
+        path = self._get_path(key, IMAGE_SUFFIX)
+        with _AtomicFile(path, 'wb') as image_file:
+            with open(image_path, 'rb') as source_file:
+                shutil.copyfileobj(source_file, image_file)
+
+    def evict(self) -> int:
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, file_name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        n_evicted = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            os.remove(path)
+            total_size -= size
+            n_evicted += 1
+        return n_evicted
+
+    def _get_path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def _touch(self, path: str) -> None:
+        # Modification time doubles as the last access time for eviction
+        os.utime(path)
+
+
+class _AtomicFile(object):
+    def __init__(self, path: str, mode: str) -> None:
+        self.path = path
+        fd, self.tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix='.tmp',
+        )
+        self.file = os.fdopen(fd, mode)
+
+    def __enter__(self) -> Any:
+        return self.file
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        self.file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
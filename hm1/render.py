@@ -0,0 +1,237 @@
+import argparse
+import ast
+import bisect
+import collections
+import itertools
+import operator
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator
+
+from draw_ast import GraphVisitor, get_engine
+
+FUNCTION_TYPES = ('FunctionDef', 'AsyncFunctionDef')
+COLLAPSED_STYLE = 'filled,dashed'
+
+Edge = tuple[int, int, dict[str, Any]]
+# Name, visibility mask and the contiguous range of node ids it covers
+Part = tuple[str, bytearray, tuple[int, int]]
+
+
+def quote(value: Any) -> str:
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return '"{0}"'.format(value.replace('\n', '\\n'))
+
+
+def format_attributes(attributes: dict[str, Any]) -> str:
+    return ', '.join(
+        '{0}={1}'.format(name, quote(value))
+        for name, value in attributes.items()
+    )
+
+
+def generate_dot(
+    visitor: GraphVisitor,
+    visible: bytearray,
+    subtree_sizes: list[int],
+    span: tuple[int, int],
+    edges: Iterable[Edge],
+) -> Iterator[str]:
+    # Only nodes in span and the given edges are scanned, so every part of
+    # a split render costs its own size
+    yield 'digraph {\n'
+    for name, attributes in visitor.graph_attributes.items():
+        yield '{0} [{1}];\n'.format(name, format_attributes(attributes))
+    for node_id, attributes in itertools.islice(visitor.nodes, *span):
+        if not visible[node_id]:
+            continue
+        # Hidden descendants are folded into their nearest visible ancestor
+        if visitor.fan_outs[node_id] and not visible[node_id + 1]:
+            attributes = dict(
+                attributes,
+                label='{0}\n(+{1} nodes)'.format(
+                    attributes['label'], subtree_sizes[node_id] - 1,
+                ),
+                style=COLLAPSED_STYLE,
+            )
+        yield '{0} [{1}];\n'.format(node_id, format_attributes(attributes))
+    for src_node_id, dst_node_id, attributes in edges:
+        if visible[src_node_id] and visible[dst_node_id]:
+            yield '{0} -> {1} [{2}];\n'.format(
+                src_node_id, dst_node_id, format_attributes(attributes),
+            )
+    yield '}\n'
+
+
+def get_depth_budget(node_depths: list[int], max_nodes: int) -> int:
+    # Deepest level at which the collapsed graph still fits into max_nodes
+    depths = collections.Counter(node_depths)
+    n_nodes = 0
+    for depth in range(max(depths, default=0) + 1):
+        n_nodes += depths[depth]
+        if n_nodes > max_nodes:
+            return max(depth - 1, 0)
+    return max(depths, default=0)
+
+
+def get_depth_mask(node_depths: list[int], max_depth: int) -> bytearray:
+    return bytearray(depth <= max_depth for depth in node_depths)
+
+
+def split_functions(
+    visitor: GraphVisitor, visible: bytearray, subtree_sizes: list[int],
+) -> list[Part]:
+    # Ids are assigned in pre-order, so every function is a contiguous range
+    # and its part shares the mask with the whole graph
+    module_visible = bytearray(visible)
+    parts = []
+    node_id = 0
+    while node_id < len(visitor.node_types):
+        if visitor.node_types[node_id] not in FUNCTION_TYPES:
+            node_id += 1
+            continue
+        end = node_id + subtree_sizes[node_id]
+        parts.append(('function_{0}'.format(node_id), visible, (node_id, end)))
+        module_visible[node_id + 1:end] = bytes(end - node_id - 1)
+        node_id = end
+    return [('module', module_visible, (0, len(visible))), *parts]
+
+
+def get_part_edges(
+    visitor: GraphVisitor, parts: list[Part],
+) -> Iterator[list[Edge]]:
+    # Edges are added after the children are visited, sorting them by
+    # source once gives every part the slice of edges that start in it
+    edges = sorted(visitor.edges, key=operator.itemgetter(0))
+    sources = [edge[0] for edge in edges]
+    for name, _, (start, stop) in parts:
+        if name == 'module':
+            yield visitor.edges
+            continue
+        yield edges[
+            bisect.bisect_left(sources, start):
+            bisect.bisect_left(sources, stop)
+        ]
+
+
+def run_graphviz(
+    lines: Iterable[str], output_path: str, engine: str, output_format: str,
+) -> None:
+    args = [
+        'dot',
+        '-K{0}'.format(engine),
+        '-T{0}'.format(output_format),
+        '-o',
+        output_path,
+    ]
+    # DOT text is streamed to Graphviz without building a NetworkX graph
+    with subprocess.Popen(args, stdin=subprocess.PIPE, text=True) as process:
+        process.stdin.writelines(lines)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args)
+
+
+def render_part(
+    visitor: GraphVisitor,
+    visible: bytearray,
+    subtree_sizes: list[int],
+    span: tuple[int, int],
+    edges: Iterable[Edge],
+    output_path: str,
+    engine: str | None = None,
+) -> str:
+    output_format = os.path.splitext(output_path)[1].lstrip('.')
+    lines = generate_dot(visitor, visible, subtree_sizes, span, edges)
+    if output_format == 'dot':
+        with open(output_path, 'w') as dot_file:
+            dot_file.writelines(lines)
+    else:
+        if engine is None:
+            engine = get_engine(sum(visible[span[0]:span[1]]))
+        run_graphviz(lines, output_path, engine, output_format)
+    return output_path
+
+
+def render(
+    visitor: GraphVisitor,
+    output_path: str,
+    *,
+    max_nodes: int | None = None,
+    max_depth: int | None = None,
+    split: bool = False,
+    engine: str | None = None,
+    n_workers: int | None = None,
+) -> list[str]:
+    if max_nodes is not None:
+        depth_budget = get_depth_budget(visitor.node_depths, max_nodes)
+        if max_depth is None or depth_budget < max_depth:
+            max_depth = depth_budget
+    if max_depth is None:
+        visible = bytearray(b'\x01' * len(visitor.nodes))
+    else:
+        visible = get_depth_mask(visitor.node_depths, max_depth)
+    subtree_sizes = visitor.stats.subtree_sizes
+    if not split:
+        return [
+            render_part(
+                visitor,
+                visible,
+                subtree_sizes,
+                (0, len(visible)),
+                visitor.edges,
+                output_path,
+                engine,
+            ),
+        ]
+
+    root, extension = os.path.splitext(output_path)
+    parts = split_functions(visitor, visible, subtree_sizes)
+    tasks = [
+        (
+            part_visible,
+            subtree_sizes,
+            span,
+            edges,
+            output_path if name == 'module' else '{0}.{1}{2}'.format(
+                root, name, extension,
+            ),
+        )
+        for (name, part_visible, span), edges in zip(
+            parts, get_part_edges(visitor, parts),
+        )
+    ]
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        return list(
+            pool.map(
+                lambda task: render_part(visitor, *task, engine),
+                tasks,
+            ),
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--max-nodes', type=int, default=None)
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--split-functions', action='store_true')
+    parser.add_argument('--engine', default=None)
+    parser.add_argument('--n-workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.source_path, 'rb') as code_file:
+        ast_object = ast.parse(code_file.read(), filename=args.source_path)
+    visitor = GraphVisitor()
+    visitor.visit(ast_object)
+    for path in render(
+        visitor,
+        args.output_path,
+        max_nodes=args.max_nodes,
+        max_depth=args.max_depth,
+        split=args.split_functions,
+        engine=args.engine,
+        n_workers=args.n_workers,
+    ):
+        print(path)
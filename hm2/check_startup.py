@@ -0,0 +1,113 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+MAX_IMPORT_TIME = 0.05
+REPEAT = 5
+GRAPH_MODULES = ('networkx', 'pygraphviz')
+COMMANDS = {
+    'parse': (['parse', 'fixtures/fib.py'], GRAPH_MODULES),
+    'stats': (['stats', 'fixtures/fib.py'], GRAPH_MODULES),
+    'latex': (
+        ['latex', '{rows_path}'],
+        ('graph_visitor', 'draw_ast', *GRAPH_MODULES),
+    ),
+}
+
+
+def get_import_times(args: list[str]) -> dict[str, int]:
+    env = dict(os.environ)
+    # Measure with cached bytecode, as in repeated hook invocations
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    import_times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_time, _, module_name = line[len('import time:'):].split('|')
+        import_times[module_name.strip()] = int(self_time)
+    return import_times
+
+
+def get_errors(stderr: str) -> str:
+    # Drop the -X importtime report, keep the traceback
+    return '\n'.join(
+        line for line in stderr.splitlines()
+        if not line.startswith('import time:')
+    )
+
+
+def measure(
+    args: list[str], baseline: set[str], repeat: int,
+) -> tuple[float, dict[str, int]]:
+    get_import_times(args)
+    timings = []
+    for _ in range(repeat):
+        import_times = get_import_times(args)
+        timings.append(
+            sum(
+                self_time for module_name, self_time in import_times.items()
+                if module_name not in baseline
+            ) / 1e6,
+        )
+    return min(timings), import_times
+
+
+def main(max_import_time: float, repeat: int) -> None:
+    baseline = set(get_import_times(['-c', 'pass']))
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rows_path = os.path.join(tmp_dir, 'rows.csv')
+        with open(rows_path, 'w') as rows_file:
+            rows_file.write('key,value\n1,2\n')
+        for command, (command_args, forbidden) in COMMANDS.items():
+            args = [
+                'cli.py',
+                *[arg.format(rows_path=rows_path) for arg in command_args],
+                '--output-path',
+                os.path.join(tmp_dir, 'output'),
+            ]
+            try:
+                import_time, import_times = measure(args, baseline, repeat)
+            except subprocess.CalledProcessError as error:
+                print(
+                    '{0}: failed with exit code {1}\n{2}'.format(
+                        command, error.returncode, get_errors(error.stderr),
+                    ),
+                )
+                failures.append(command)
+                continue
+            imported = sorted(
+                module_name for module_name in import_times
+                if module_name.split('.')[0] in forbidden
+            )
+            print(
+                '{0}: import time={1:.4f}s, forbidden imports={2}'.format(
+                    command, import_time, imported or 'none',
+                ),
+            )
+            if imported or import_time > max_import_time:
+                failures.append(command)
+    if failures:
+        print('Startup check failed: {0}'.format(', '.join(failures)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--max-import-time', type=float, default=MAX_IMPORT_TIME,
+    )
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    main(args.max_import_time, args.repeat)
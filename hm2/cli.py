@@ -0,0 +1,112 @@
+import argparse
+import sys
+from typing import Any, Iterator, TextIO
+
+# Heavy modules are imported inside the subcommands that need them
+
+
+def open_output(output_path: str) -> TextIO:
+    if output_path == '-':
+        return open(sys.stdout.fileno(), 'w', closefd=False)
+    return open(output_path, 'w')
+
+
+def get_visitor(source_path: str, build_graph: bool) -> Any:
+    import ast
+
+    from graph_visitor import GraphVisitor
+
+    with open(source_path, 'rb') as code_file:
+        ast_object = ast.parse(code_file.read(), filename=source_path)
+    visitor = GraphVisitor(build_graph=build_graph)
+    visitor.visit(ast_object)
+    return visitor
+
+
+def read_rows(input_path: str) -> Iterator[list[str]]:
+    import csv
+
+    with open(input_path, newline='') as input_file:
+        yield from csv.reader(input_file)
+
+
+def parse_command(args: argparse.Namespace) -> None:
+    import json
+
+    visitor = get_visitor(args.source_path, build_graph=True)
+    with open_output(args.output_path) as output_file:
+        json.dump(
+            {'nodes': visitor.nodes, 'edges': visitor.edges}, output_file,
+        )
+
+
+def stats_command(args: argparse.Namespace) -> None:
+    import json
+
+    stats = get_visitor(args.source_path, build_graph=False).stats
+    with open_output(args.output_path) as output_file:
+        json.dump(stats._asdict(), output_file, indent=2)
+
+
+def render_command(args: argparse.Namespace) -> None:
+    visitor = get_visitor(args.source_path, build_graph=True)
+    visitor.draw_graph(args.output_path)
+
+
+def latex_command(args: argparse.Namespace) -> None:
+    import generate_latex
+
+    if args.input_path.endswith('.py'):
+        stats = get_visitor(args.input_path, build_graph=False).stats
+        tables = list(
+            map(
+                generate_latex.generate_latex_table,
+                generate_latex.get_stats_tables(stats),
+            ),
+        )
+    else:
+        tables = [
+            generate_latex.generate_latex_table(read_rows(args.input_path)),
+        ]
+    if args.image_path is not None:
+        tables.append(
+            generate_latex.generate_latex_image(
+                args.image_path, 'AST graph.', 'graph',
+            ),
+        )
+    with open_output(args.output_path) as output_file:
+        generate_latex.write_lines(
+            generate_latex.generate_document(*tables), output_file,
+        )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(required=True)
+
+    parse_parser = subparsers.add_parser('parse')
+    parse_parser.add_argument('source_path')
+    parse_parser.add_argument('--output-path', '-o', default='-')
+    parse_parser.set_defaults(command=parse_command)
+
+    stats_parser = subparsers.add_parser('stats')
+    stats_parser.add_argument('source_path')
+    stats_parser.add_argument('--output-path', '-o', default='-')
+    stats_parser.set_defaults(command=stats_command)
+
+    render_parser = subparsers.add_parser('render')
+    render_parser.add_argument('source_path')
+    render_parser.add_argument('output_path')
+    render_parser.set_defaults(command=render_command)
+
+    latex_parser = subparsers.add_parser('latex')
+    latex_parser.add_argument('input_path', help='Python source or CSV rows')
+    latex_parser.add_argument('--output-path', '-o', default='-')
+    latex_parser.add_argument('--image-path', default=None)
+    latex_parser.set_defaults(command=latex_command)
+    return parser
+
+
+if __name__ == '__main__':
+    args = get_parser().parse_args()
+    args.command(args)
@@ -1,8 +1,27 @@
-import ast
+import collections
+import itertools
 import operator
-from typing import Any
-
-from ast_graph_builder.graph_visitor import GraphVisitor
+from typing import Any, Iterable, Iterator, Sequence, TextIO
+
+# Longer tables are emitted as longtable, which breaks across pages
+MAX_TABULAR_ROWS = 40
+CHUNK_SIZE = 4096
+LATEX_ESCAPES = str.maketrans(
+    {
+        '\\': r'\textbackslash{}',
+        '&': r'\&',
+        '%': r'\%',
+        '$': r'\$',
+        '#': r'\#',
+        '_': r'\_',
+        '{': r'\{',
+        '}': r'\}',
+        '~': r'\textasciitilde{}',
+        '^': r'\textasciicircum{}',
+        '<': r'\textless{}',
+        '>': r'\textgreater{}',
+    },
+)
 
 
 def get_block_start(block_name: str) -> str:
@@ -17,25 +36,55 @@ def get_horizontal_line() -> str:
     return r'\hline'
 
 
-def get_table_start(n_columns: int) -> str:
-    table_start = get_block_start('tabular')
+def get_table_start(n_columns: int, block_name: str = 'tabular') -> str:
+    table_start = get_block_start(block_name)
     n_columns = operator.add(n_columns, 1)
     alignment = ' c '.join(operator.mul(list('|'), n_columns))
     return operator.add(table_start, '{{ {0} }}'.format(alignment))
 
 
-def get_table_row(data: list[Any]) -> str:
-    row_values = ' & '.join(map(str, data))
+def escape_latex(value: Any) -> str:
+    return str(value).translate(LATEX_ESCAPES)
+
+
+def get_table_row(data: Sequence[Any]) -> str:
+    row_values = ' & '.join(map(escape_latex, data))
     row_values = operator.add(row_values, r' \\ ')
     return operator.add(row_values, get_horizontal_line())
 
 
-def generate_latex_table(data: list[list[Any]]) -> list[str]:
+def generate_latex_table(
+    data: Iterable[Sequence[Any]], max_tabular_rows: int = MAX_TABULAR_ROWS,
+) -> Iterator[str]:
+    rows = iter(data)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError('Table must have a header row')
+    # Only a bounded prefix is buffered to choose between the environments
+    first_rows = list(itertools.islice(rows, max_tabular_rows + 1))
+    block_name = 'tabular'
+    if len(first_rows) > max_tabular_rows:
+        block_name = 'longtable'
+
+    yield get_table_start(len(header), block_name)
+    yield get_horizontal_line()
+    yield get_table_row(header)
+    if block_name == 'longtable':
+        yield r'\endhead'
+    yield from map(get_table_row, itertools.chain(first_rows, rows))
+    yield get_block_end(block_name)
+
+
+def get_stats_tables(stats: Any) -> list[list[list[Any]]]:
+    histograms = [
+        ('Node', stats.node_types),
+        ('Depth', stats.depths),
+        ('Fan-out', stats.fan_outs),
+        ('Subtree size', collections.Counter(stats.subtree_sizes)),
+    ]
     return [
-        get_table_start(len(data[0])),
-        get_horizontal_line(),
-        *list(map(get_table_row, data)),
-        get_block_end('tabular'),
+        [[name, 'Count'], *map(list, sorted(counter.items()))]
+        for name, counter in histograms
     ]
 
 
@@ -51,38 +100,40 @@ def generate_latex_image(
     ]
 
 
+def generate_document(*blocks: Iterable[str]) -> Iterator[str]:
+    yield r'\documentclass{article}'
+    yield r'\usepackage{graphicx}'
+    yield r'\usepackage{longtable}'
+    yield get_block_start('document')
+    yield get_block_start('center')
+    yield from itertools.chain.from_iterable(blocks)
+    yield get_block_end('center')
+    yield get_block_end('document')
+
+
+def write_lines(
+    lines: Iterable[str], output_file: TextIO, chunk_size: int = CHUNK_SIZE,
+) -> None:
+    lines = iter(lines)
+    while chunk := list(itertools.islice(lines, chunk_size)):
+        output_file.write('\n'.join(chunk))
+        output_file.write('\n')
+
+
 if __name__ == '__main__':
+    import ast
+
+    from graph_visitor import GraphVisitor
+
     with open('fixtures/fib.py') as code_file:
         ast_object = ast.parse(code_file.read())
     visitor = GraphVisitor()
     visitor.visit(ast_object)
     visitor.draw_graph('fixtures/image.png')
 
-    sample_data = [
-        ['Node', 'Count'],
-        ['Assign', 2],
-        ['BinOp', 1],
-        ['Call', 1],
-        ['Constant', 2],
-        ['For', 1],
-        ['FunctionDef', 1],
-        ['Name', 11],
-        ['Tuple', 4],
-        ['Yield', 1],
-    ]
-
-    lines = [
-        r'\documentclass{article}',
-        r'\usepackage{graphicx}',
-        get_block_start('document'),
-        get_block_start('center'),
-        *generate_latex_table(sample_data),
-        *generate_latex_image('fixtures/image.png', 'AST graph.', 'graph'),
-        get_block_end('center'),
-        get_block_end('document'),
-    ]
-
+    document = generate_document(
+        *map(generate_latex_table, get_stats_tables(visitor.stats)),
+        generate_latex_image('fixtures/image.png', 'AST graph.', 'graph'),
+    )
     with open('artifacts/doc.tex', 'w') as tex_file:
-        for line in lines:
-            tex_file.write(line)
-            tex_file.write('\n')
+        write_lines(document, tex_file)
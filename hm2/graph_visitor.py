@@ -0,0 +1,15 @@
+import os
+import sys
+
+# The published ast-graph-builder release predates build_graph, stats,
+# nodes and edges, so GraphVisitor is taken from hm1 of this repository
+HM1_DIR = os.environ.get(
+    'HM1_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'hm1'),
+)
+if HM1_DIR not in sys.path:
+    sys.path.insert(0, HM1_DIR)
+
+from draw_ast import GraphVisitor  # noqa: E402
+
+__all__ = ['GraphVisitor']
@@ -0,0 +1,98 @@
+import argparse
+import operator
+import os
+import time
+from typing import Any, Callable
+
+import numpy as np
+
+from matrix import ArrayLike
+
+SIZE = 256
+REPEAT = 200
+
+OPERATIONS: dict[str, Callable[[Any, Any], Any]] = {
+    'x = x + y': operator.add,
+    'x += y': operator.iadd,
+    'np.add(x, y, out=x)': lambda x, y: np.add(x, y, out=x),
+    'x = x * y': operator.mul,
+    'x *= y': operator.imul,
+    'x = x @ y': operator.matmul,
+    'x @= y': operator.imatmul,
+    'x = np.sin(x)': lambda x, y: np.sin(x),
+    'np.sin(x, out=x)': lambda x, y: np.sin(x, out=x),
+    'x = x[::2][::-1]': lambda x, y: x[::2][::-1],
+}
+
+
+def get_data(x: Any) -> np.ndarray:
+    return x.value if isinstance(x, ArrayLike) else x
+
+
+def benchmark_operation(
+    operation: Callable[[Any, Any], Any],
+    wrapper: Callable[[np.ndarray], Any],
+    size: int,
+    repeat: int,
+) -> tuple[float, float, float]:
+    new_buffers, new_objects = 0, 0
+    elapsed = 0.0
+    y = wrapper(np.full((size, size), 1e-3))
+    for _ in range(repeat):
+        x = wrapper(np.random.rand(size, size))
+        start = time.perf_counter()
+        result = operation(x, y)
+        elapsed += time.perf_counter() - start
+        new_objects += result is not x
+        new_buffers += not np.shares_memory(get_data(result), get_data(x))
+    return elapsed / repeat, new_buffers / repeat, new_objects / repeat
+
+
+def main(size: int, repeat: int, output_path: str) -> None:
+    wrappers = {'ndarray': np.asarray, 'ArrayLike': ArrayLike}
+    lines = [
+        'size={0}, repeat={1}'.format(size, repeat),
+        ' '.join([
+            'operation'.ljust(22),
+            'type'.ljust(10),
+            'time, s'.rjust(10),
+            'buffers/op'.rjust(11),
+            'objects/op'.rjust(11),
+        ]),
+    ]
+    for name, operation in OPERATIONS.items():
+        for wrapper_name, wrapper in wrappers.items():
+            try:
+                timing, new_buffers, new_objects = benchmark_operation(
+                    operation, wrapper, size, repeat,
+                )
+            except TypeError:
+                lines.append(' '.join([
+                    name.ljust(22), wrapper_name.ljust(10), 'unsupported',
+                ]))
+                continue
+            lines.append(' '.join([
+                name.ljust(22),
+                wrapper_name.ljust(10),
+                '{0:.6f}'.format(timing).rjust(10),
+                '{0:.2f}'.format(new_buffers).rjust(11),
+                '{0:.2f}'.format(new_objects).rjust(11),
+            ]))
+
+    with open(output_path, 'w') as output_file:
+        output_file.write('\n'.join(lines))
+    print('\n'.join(lines))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=SIZE)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument(
+        '--output-path',
+        default=os.path.join('artifacts', 'arraylike_benchmark.txt'),
+    )
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    main(args.size, args.repeat, args.output_path)
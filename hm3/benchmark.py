@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import numpy as np
+
+from cache import cache_scope
+from matrix import ArrayLike, Matrix
+
+SIZES = tuple(2 ** power for power in range(1, 12))
+DTYPES = ('int', 'float')
+BACKENDS = ('Matrix', 'ArrayLike', 'numpy')
+OPERATIONS = ('construct', 'add', 'mul', 'matmul', 'hash', 'to_txt')
+REPEAT = 5
+REGRESSION_THRESHOLD = 1.2
+# Timings below this are dominated by noise and are not compared
+MIN_COMPARED_TIME = 1e-4
+HASH_MODULUS = 47
+
+Workload = Callable[[], Any]
+
+
+def generate_values(size: int, dtype: str) -> np.ndarray:
+    if dtype == 'int':
+        return np.random.randint(0, 10, (size, size))
+    return np.random.rand(size, size)
+
+
+def get_workloads(
+    backend: str, values1: np.ndarray, values2: np.ndarray, output_path: str,
+) -> dict[str, Workload]:
+    if backend == 'Matrix':
+        data1, data2 = values1.tolist(), values2.tolist()
+        m1, m2 = Matrix(data1), Matrix(data2)
+        return {
+            'construct': lambda: Matrix(data1),
+            'add': lambda: m1 + m2,
+            'mul': lambda: m1 * m2,
+            'matmul': lambda: m1 @ m2,
+            'hash': lambda: hash(m1),
+            'to_txt': lambda: m1.to_txt(output_path),
+        }
+    if backend == 'ArrayLike':
+        data1 = values1.tolist()
+        a1, a2 = ArrayLike(values1), ArrayLike(values2)
+        return {
+            'construct': lambda: ArrayLike(data1),
+            'add': lambda: a1 + a2,
+            'mul': lambda: a1 * a2,
+            'matmul': lambda: a1 @ a2,
+            'hash': lambda: int(np.sum(a1)) % HASH_MODULUS,
+            'to_txt': lambda: a1.to_txt(output_path),
+        }
+    data1 = values1.tolist()
+    return {
+        'construct': lambda: np.array(data1),
+        'add': lambda: values1 + values2,
+        'mul': lambda: values1 * values2,
+        'matmul': lambda: values1 @ values2,
+        'hash': lambda: int(values1.sum()) % HASH_MODULUS,
+        'to_txt': lambda: np.savetxt(output_path, values1, fmt='%5s'),
+    }
+
+
+def measure(workload: Workload, repeat: int) -> dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = workload()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(
+        stat.count_diff
+        for stat in after.compare_to(before, 'filename')
+        if stat.count_diff > 0
+    )
+    del result
+
+    return {
+        'time_min': min(timings),
+        'time_median': statistics.median(timings),
+        'peak_memory': peak_memory,
+        'allocations': allocations,
+    }
+
+
+def run(
+    sizes: list[int],
+    dtypes: list[str],
+    backends: list[str],
+    operations: list[str],
+    repeat: int,
+) -> list[dict[str, Any]]:
+    records = []
+    with tempfile.TemporaryDirectory() as tmp_dir, cache_scope(None):
+        output_path = os.path.join(tmp_dir, 'matrix.txt')
+        for size in sizes:
+            for dtype in dtypes:
+                values1 = generate_values(size, dtype)
+                values2 = generate_values(size, dtype)
+                for backend in backends:
+                    workloads = get_workloads(
+                        backend, values1, values2, output_path,
+                    )
+                    for operation in operations:
+                        record = {
+                            'backend': backend,
+                            'operation': operation,
+                            'size': size,
+                            'dtype': dtype,
+                        }
+                        record.update(measure(workloads[operation], repeat))
+                        records.append(record)
+                        print(format_record(record), flush=True)
+    return records
+
+
+def get_record_key(record: dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        record['backend'], record['operation'], record['size'], record['dtype'],
+    )
+
+
+def compare(
+    records: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    threshold: float,
+) -> list[str]:
+    baseline_records = {get_record_key(record): record for record in baseline}
+    regressions = []
+    for record in records:
+        baseline_record = baseline_records.get(get_record_key(record))
+        if baseline_record is None:
+            continue
+        if baseline_record['time_min'] < MIN_COMPARED_TIME:
+            continue
+        ratio = record['time_min'] / baseline_record['time_min']
+        if ratio > threshold:
+            regressions.append(
+                '{0}, x{1:.2f} slower than baseline'.format(
+                    format_record(record), ratio,
+                ),
+            )
+    return regressions
+
+
+def format_record(record: dict[str, Any]) -> str:
+    return (
+        '{backend:>9} {operation:>9} {size:>5} {dtype:>5} '
+        'time={time_min:.6f}s peak={peak_memory}B '
+        'allocations={allocations}'
+    ).format(**record)
+
+
+def get_environment() -> dict[str, str]:
+    return {
+        'python': sys.version,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--dtypes', nargs='+', default=DTYPES, choices=DTYPES)
+    parser.add_argument(
+        '--backends', nargs='+', default=BACKENDS, choices=BACKENDS,
+    )
+    parser.add_argument(
+        '--operations', nargs='+', default=OPERATIONS, choices=OPERATIONS,
+    )
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--output-path', default=os.path.join('artifacts', 'benchmark.json'),
+    )
+    parser.add_argument(
+        '--baseline-path',
+        default=os.path.join('artifacts', 'benchmark_baseline.json'),
+    )
+    parser.add_argument('--no-compare', action='store_true')
+    parser.add_argument(
+        '--threshold', type=float, default=REGRESSION_THRESHOLD,
+    )
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    records = run(
+        args.sizes, args.dtypes, args.backends, args.operations, args.repeat,
+    )
+    with open(args.output_path, 'w') as output_file:
+        json.dump(
+            {
+                'environment': get_environment(),
+                'seed': args.seed,
+                'repeat': args.repeat,
+                'records': records,
+            },
+            output_file,
+            indent=2,
+        )
+
+    if not args.no_compare and os.path.exists(args.baseline_path):
+        with open(args.baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['records']
+        regressions = compare(records, baseline, args.threshold)
+        for regression in regressions:
+            print('REGRESSION {0}'.format(regression))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+DEFAULT_MAX_BYTES = 64 * 1024 ** 2
+
+CacheKey = tuple[str, bytes, bytes]
+
+
+@dataclass
+class CacheStats(object):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    rejections: int = 0
+
+
+class CacheEntry(object):
+    __slots__ = ('operands', 'result', 'n_bytes')
+
+    def __init__(self, operands: tuple[Any, Any], result: Any) -> None:
+        self.operands = operands
+        self.result = result
+        self.n_bytes = sum(
+            get_n_bytes(matrix) for matrix in (*operands, result)
+        )
+
+
+class ResultCache(object):
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.stats = CacheStats()
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        # The default cache is shared by every thread
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, operation: str, a: Any, b: Any) -> Any | None:
+        key = self._get_key(operation, a, b)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            operand_a, operand_b = entry.operands
+            if not (is_same(operand_a, a) and is_same(operand_b, b)):
+                self.stats.rejections += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+        # Rows are writable views, callers get their own copy of the result
+        return entry.result.copy()
+
+    def store(self, operation: str, a: Any, b: Any, result: Any) -> None:
+        entry = CacheEntry((a, b), result.copy())
+        if entry.n_bytes > self.max_bytes:
+            return
+        key = self._get_key(operation, a, b)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = entry
+            self.n_bytes += entry.n_bytes
+            while self.n_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.n_bytes -= evicted.n_bytes
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.n_bytes = 0
+
+    def _discard(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.n_bytes -= entry.n_bytes
+
+    def _get_key(self, operation: str, a: Any, b: Any) -> CacheKey:
+        return operation, fingerprint(a), fingerprint(b)
+
+
+def fingerprint(matrix: Any) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(
+        '{0}x{1}:{2}'.format(*matrix.shape, matrix.typecode).encode(),
+    )
+    digest.update(matrix.data)
+    return digest.digest()
+
+
+def is_same(matrix1: Any, matrix2: Any) -> bool:
+    if matrix1 is matrix2:
+        return True
+    return (
+        matrix1.shape == matrix2.shape
+        and matrix1.typecode == matrix2.typecode
+        and matrix1.data == matrix2.data
+    )
+
+
+def get_n_bytes(matrix: Any) -> int:
+    return matrix.data.itemsize * len(matrix.data)
+
+
+_current_cache: ContextVar[ResultCache | None] = ContextVar(
+    'current_cache', default=ResultCache(),
+)
+
+
+def get_cache() -> ResultCache | None:
+    return _current_cache.get()
+
+
+@contextmanager
+def cache_scope(cache: ResultCache | None) -> Iterator[ResultCache | None]:
+    token = _current_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_cache.reset(token)
@@ -0,0 +1,158 @@
+import argparse
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+BATCH_SIZE = 2 ** 18
+MODULUS = 47
+
+HashFunc = Callable[[np.ndarray, int], np.ndarray]
+
+
+class Collision(NamedTuple):
+    a: np.ndarray
+    b: np.ndarray
+    c: np.ndarray
+    d: np.ndarray
+
+
+class SearchResult(NamedTuple):
+    collisions: list[Collision]
+    n_candidates: int
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        return self.n_candidates / self.elapsed if self.elapsed else 0.0
+
+
+def sum_hash(batch: np.ndarray, modulus: int) -> np.ndarray:
+    # Vectorized HashMixin.__hash__ for a batch of matrices
+    return batch.sum(axis=(1, 2)) % modulus
+
+
+def search_batch(
+    seed: np.random.SeedSequence,
+    shape_a: tuple[int, int],
+    shape_b: tuple[int, int],
+    *,
+    modulus: int = MODULUS,
+    batch_size: int = BATCH_SIZE,
+    low: int = 0,
+    high: int = 10,
+    hash_func: HashFunc = sum_hash,
+    limit: int | None = None,
+) -> list[Collision]:
+    rng = np.random.default_rng(seed)
+    candidates = rng.integers(low, high, (batch_size, *shape_a))
+    hashes = hash_func(candidates, modulus)
+
+    # Neighbours in hash order share a bucket when their hashes are equal
+    order = np.argsort(hashes, kind='stable')
+    same_bucket = hashes[order[1:]] == hashes[order[:-1]]
+    left, right = order[:-1][same_bucket], order[1:][same_bucket]
+    different = np.any(candidates[left] != candidates[right], axis=(1, 2))
+    left, right = left[different], right[different]
+
+    b = rng.integers(low, high, (len(left), *shape_b))
+    ab = np.matmul(candidates[left], b)
+    cd = np.matmul(candidates[right], b)
+    found = np.flatnonzero(np.any(ab != cd, axis=(1, 2)))[:limit]
+
+    return [
+        Collision(candidates[i], b[k], candidates[j], b[k].copy())
+        for k, i, j in zip(found, left[found], right[found])
+    ]
+
+
+def find_collisions(
+    shape_a: tuple[int, int] = (2, 2),
+    shape_b: tuple[int, int] | None = None,
+    *,
+    n_collisions: int = 1,
+    modulus: int = MODULUS,
+    batch_size: int = BATCH_SIZE,
+    low: int = 0,
+    high: int = 10,
+    hash_func: HashFunc = sum_hash,
+    seed: int | None = None,
+    n_workers: int = 1,
+    max_batches: int | None = None,
+) -> SearchResult:
+    if shape_b is None:
+        shape_b = shape_a[::-1]
+    kwargs = {
+        'modulus': modulus,
+        'batch_size': batch_size,
+        'low': low,
+        'high': high,
+        'hash_func': hash_func,
+        'limit': n_collisions,
+    }
+    root_seed = np.random.SeedSequence(seed)
+    seeds = (root_seed.spawn(1)[0] for _ in itertools.count())
+    if max_batches is not None:
+        seeds = itertools.islice(seeds, max_batches)
+
+    collisions: list[Collision] = []
+    n_batches = 0
+    start = time.perf_counter()
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            while len(collisions) < n_collisions:
+                round_seeds = list(itertools.islice(seeds, n_workers))
+                if not round_seeds:
+                    break
+                tasks = [
+                    pool.submit(
+                        search_batch, round_seed, shape_a, shape_b, **kwargs,
+                    )
+                    for round_seed in round_seeds
+                ]
+                for task in tasks:
+                    collisions.extend(task.result())
+                n_batches += len(round_seeds)
+    else:
+        for batch_seed in seeds:
+            collisions.extend(
+                search_batch(batch_seed, shape_a, shape_b, **kwargs),
+            )
+            n_batches += 1
+            if len(collisions) >= n_collisions:
+                break
+
+    return SearchResult(
+        collisions[:n_collisions],
+        n_batches * batch_size,
+        time.perf_counter() - start,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shape-a', type=int, nargs=2, default=(2, 2))
+    parser.add_argument('--shape-b', type=int, nargs=2, default=None)
+    parser.add_argument('--modulus', type=int, default=MODULUS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--n-collisions', type=int, default=1)
+    parser.add_argument('--n-workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = find_collisions(
+        tuple(args.shape_a),
+        None if args.shape_b is None else tuple(args.shape_b),
+        n_collisions=args.n_collisions,
+        modulus=args.modulus,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        n_workers=args.n_workers,
+    )
+    print(
+        'Found {0} collisions in {1} candidates, {2:.0f} candidates/s'.format(
+            len(result.collisions), result.n_candidates, result.throughput,
+        ),
+    )
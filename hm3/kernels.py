@@ -0,0 +1,293 @@
+import itertools
+import math
+import operator
+from array import array
+from typing import Any, Callable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+L2_CACHE_SIZE = 256 * 1024
+NUMPY_THRESHOLD = 64 ** 3
+STRASSEN_CUTOFF = 64
+INT64_MAX = 2 ** 63 - 1
+
+MATMUL_METHODS = ('auto', 'naive', 'blocked', 'strassen', 'numpy')
+
+Rows = list[list[Any]]
+
+_DTYPES = {'q': 'int64', 'd': 'float64'}
+
+
+if hasattr(math, 'sumprod'):
+    dot = math.sumprod
+else:
+    def dot(x: list[Any], y: list[Any]) -> Any:
+        return sum(map(operator.mul, x, y))
+
+
+def matmul(
+    a: array,
+    b: array,
+    shape_a: tuple[int, int],
+    shape_b: tuple[int, int],
+    typecode: str,
+    *,
+    method: str = 'auto',
+    numpy_threshold: int | None = NUMPY_THRESHOLD,
+    strassen_cutoff: int = STRASSEN_CUTOFF,
+) -> array:
+    method = resolve_method(
+        method, shape_a, shape_b, numpy_threshold, operands=(a, b),
+    )
+
+    if method == 'naive':
+        return naive_matmul(a, b, shape_a, shape_b, typecode)
+    if method == 'strassen':
+        return strassen_matmul(
+            a, b, shape_a, shape_b, typecode, cutoff=strassen_cutoff,
+        )
+    if method == 'numpy':
+        if np is None:
+            raise ImportError('numpy is required for the numpy matmul method')
+        return numpy_matmul(a, b, shape_a, shape_b, typecode)
+    return blocked_matmul(a, b, shape_a, shape_b, typecode)
+
+
+def resolve_method(
+    method: str,
+    shape_a: tuple[int, int],
+    shape_b: tuple[int, int],
+    numpy_threshold: int | None = NUMPY_THRESHOLD,
+    *,
+    operands: tuple[array, array] | None = None,
+) -> str:
+    if method not in MATMUL_METHODS:
+        raise ValueError(
+            'unknown matmul method {0!r}, expected one of {1}'.format(
+                method, MATMUL_METHODS,
+            ),
+        )
+    if method != 'auto':
+        return method
+    n_ops = shape_a[0] * shape_a[1] * shape_b[1]
+    if np is not None and numpy_threshold is not None:
+        # int64 products wrap around silently, integer data goes to numpy
+        # only when no partial sum can leave the int64 range
+        if n_ops >= numpy_threshold and (
+            operands is None or fits_int64(*operands, shape_a[1])
+        ):
+            return 'numpy'
+    return 'blocked'
+
+
+def naive_matmul(
+    a: array,
+    b: array,
+    shape_a: tuple[int, int],
+    shape_b: tuple[int, int],
+    typecode: str,
+) -> array:
+    n_rows, n_inner = shape_a
+    n_columns = shape_b[1]
+    output = array(typecode, [0]) * (n_rows * n_columns)
+
+    for i in range(n_rows):
+        for j in range(n_columns):
+            for k in range(n_inner):
+                output[i * n_columns + j] += (
+                    a[i * n_inner + k] * b[k * n_columns + j]
+                )
+
+    return output
+
+
+def blocked_matmul(
+    a: array,
+    b: array,
+    shape_a: tuple[int, int],
+    shape_b: tuple[int, int],
+    typecode: str,
+    *,
+    block_size: int | None = None,
+) -> array:
+    n_rows, n_inner = shape_a
+    n_columns = shape_b[1]
+    if block_size is None:
+        block_size = get_block_size(n_inner, b.itemsize)
+
+    a_rows = pack_rows(a, shape_a)
+    b_columns = pack_columns(b, shape_b)
+    output = array(typecode, [0]) * (n_rows * n_columns)
+
+    for i_start in range(0, n_rows, block_size):
+        i_stop = min(i_start + block_size, n_rows)
+        for j_start in range(0, n_columns, block_size):
+            j_stop = min(j_start + block_size, n_columns)
+            b_block = b_columns[j_start:j_stop]
+            for i in range(i_start, i_stop):
+                row = a_rows[i]
+                offset = i * n_columns + j_start
+                output[offset:offset + len(b_block)] = array(
+                    typecode, [dot(row, column) for column in b_block],
+                )
+
+    return output
+
+
+def strassen_matmul(
+    a: array,
+    b: array,
+    shape_a: tuple[int, int],
+    shape_b: tuple[int, int],
+    typecode: str,
+    *,
+    cutoff: int = STRASSEN_CUTOFF,
+) -> array:
+    # Only square operands are split, rectangular products use the
+    # blocked kernel
+    if shape_a[0] != shape_a[1] or shape_a != shape_b:
+        return blocked_matmul(a, b, shape_a, shape_b, typecode)
+
+    rows = _strassen(pack_rows(a, shape_a), pack_rows(b, shape_b), cutoff)
+
+    return array(typecode, itertools.chain.from_iterable(rows))
+
+
+def numpy_matmul(
+    a: array,
+    b: array,
+    shape_a: tuple[int, int],
+    shape_b: tuple[int, int],
+    typecode: str,
+) -> array:
+    dtype = _DTYPES[typecode]
+    a_view = np.frombuffer(a, dtype=_DTYPES[get_typecode(a)])
+    b_view = np.frombuffer(b, dtype=_DTYPES[get_typecode(b)])
+    if not fits_int64(a, b, shape_a[1]):
+        # Integer products are computed in int64 and would wrap around
+        if typecode != 'd':
+            raise OverflowError('integer matmul result may exceed int64')
+        a_view = a_view.astype(np.float64)
+    result = np.matmul(
+        a_view.reshape(shape_a), b_view.reshape(shape_b),
+    ).astype(dtype, copy=False)
+    output = array(typecode)
+    output.frombytes(result.tobytes())
+    return output
+
+
+def with_float_fallback(
+    compute: Callable[[str], array], typecode: str,
+) -> array:
+    # Integer results outside int64 are stored as float64, which keeps
+    # them exact only up to 2 ** 53
+    try:
+        return compute(typecode)
+    except OverflowError:
+        if typecode != 'q':
+            raise
+    return compute('d')
+
+
+def get_typecode(data: array | memoryview) -> str:
+    if isinstance(data, memoryview):
+        return data.format
+    return data.typecode
+
+
+def fits_int64(a: array, b: array, n_inner: int) -> bool:
+    # Bound on any partial sum of an integer product, float data is not
+    # checked. Called only when numpy is available
+    if get_typecode(a) != 'q' or get_typecode(b) != 'q':
+        return True
+    return get_max_abs(a) * get_max_abs(b) * n_inner <= INT64_MAX
+
+
+def get_max_abs(data: array) -> int:
+    if not len(data):
+        return 0
+    view = np.frombuffer(data, dtype=np.int64)
+    return max(int(view.max()), -int(view.min()))
+
+
+def get_block_size(n_inner: int, itemsize: int) -> int:
+    # Number of packed columns of the right operand that fit into L2
+    return max(1, L2_CACHE_SIZE // max(1, n_inner * itemsize))
+
+
+def pack_rows(data: array, shape: tuple[int, int]) -> list[list[Any]]:
+    n_columns = shape[1]
+    return [
+        data[i * n_columns:(i + 1) * n_columns].tolist()
+        for i in range(shape[0])
+    ]
+
+
+def pack_columns(data: array, shape: tuple[int, int]) -> list[list[Any]]:
+    n_columns = shape[1]
+    return [data[j::n_columns].tolist() for j in range(n_columns)]
+
+
+def _strassen(a: Rows, b: Rows, cutoff: int) -> Rows:
+    size = len(a)
+    if size <= max(cutoff, 1):
+        columns = list(zip(*b))
+        return [[dot(row, column) for column in columns] for row in a]
+
+    if size % 2:
+        # Odd sizes are padded with one zero row and column per level
+        a = _pad(a)
+        b = _pad(b)
+        return [row[:size] for row in _strassen(a, b, cutoff)[:size]]
+
+    a11, a12, a21, a22 = _split(a)
+    b11, b12, b21, b22 = _split(b)
+
+    m1 = _strassen(_add(a11, a22), _add(b11, b22), cutoff)
+    m2 = _strassen(_add(a21, a22), b11, cutoff)
+    m3 = _strassen(a11, _sub(b12, b22), cutoff)
+    m4 = _strassen(a22, _sub(b21, b11), cutoff)
+    m5 = _strassen(_add(a11, a12), b22, cutoff)
+    m6 = _strassen(_sub(a21, a11), _add(b11, b12), cutoff)
+    m7 = _strassen(_sub(a12, a22), _add(b21, b22), cutoff)
+
+    c11 = _add(_sub(_add(m1, m4), m5), m7)
+    c12 = _add(m3, m5)
+    c21 = _add(m2, m4)
+    c22 = _add(_add(_sub(m1, m2), m3), m6)
+
+    top = [row1 + row2 for row1, row2 in zip(c11, c12)]
+    bottom = [row1 + row2 for row1, row2 in zip(c21, c22)]
+    return top + bottom
+
+
+def _split(rows: Rows) -> tuple[Rows, Rows, Rows, Rows]:
+    half = len(rows) // 2
+    top, bottom = rows[:half], rows[half:]
+    return (
+        [row[:half] for row in top],
+        [row[half:] for row in top],
+        [row[:half] for row in bottom],
+        [row[half:] for row in bottom],
+    )
+
+
+def _pad(rows: Rows) -> Rows:
+    padded = [row + [0] for row in rows]
+    padded.append([0] * (len(rows) + 1))
+    return padded
+
+
+def _elementwise(op: Callable[[Any, Any], Any], a: Rows, b: Rows) -> Rows:
+    return [list(map(op, row1, row2)) for row1, row2 in zip(a, b)]
+
+
+def _add(a: Rows, b: Rows) -> Rows:
+    return _elementwise(operator.add, a, b)
+
+
+def _sub(a: Rows, b: Rows) -> Rows:
+    return _elementwise(operator.sub, a, b)
@@ -0,0 +1,211 @@
+import functools
+from array import array
+from typing import Any, Callable
+
+import kernels
+
+ELEMENTWISE_SYMBOLS = {'add': '+', 'mul': '*'}
+# Number of compiled expression shapes kept for reuse
+COMPILED_CACHE_SIZE = 256
+# Deeper elementwise trees are split into separately fused parts, the
+# parser rejects about 200 nested parentheses
+MAX_FUSED_DEPTH = 50
+
+NodeKey = tuple[Any, ...]
+
+
+class LazyMatrix(object):
+    __slots__ = ('operation', 'operands', 'shape', 'matrix', 'key')
+
+    def __init__(
+        self,
+        operation: str,
+        operands: tuple['LazyMatrix', ...],
+        shape: tuple[int, int],
+        matrix: Any = None,
+    ) -> None:
+        self.operation = operation
+        self.operands = operands
+        self.shape = shape
+        self.matrix = matrix
+        if matrix is not None:
+            self.key: NodeKey = ('leaf', id(matrix))
+        else:
+            self.key = (operation, *[operand.key for operand in operands])
+
+    @classmethod
+    def leaf(cls, matrix: Any) -> 'LazyMatrix':
+        return cls('leaf', (), matrix.shape, matrix)
+
+    def __add__(self, other: Any) -> 'LazyMatrix':
+        return self._elementwise('add', self, _wrap(other))
+
+    def __radd__(self, other: Any) -> 'LazyMatrix':
+        return self._elementwise('add', _wrap(other), self)
+
+    def __mul__(self, other: Any) -> 'LazyMatrix':
+        return self._elementwise('mul', self, _wrap(other))
+
+    def __rmul__(self, other: Any) -> 'LazyMatrix':
+        return self._elementwise('mul', _wrap(other), self)
+
+    def __matmul__(self, other: Any) -> 'LazyMatrix':
+        return self._matmul(self, _wrap(other))
+
+    def __rmatmul__(self, other: Any) -> 'LazyMatrix':
+        return self._matmul(_wrap(other), self)
+
+    def __repr__(self) -> str:
+        if self.matrix is not None:
+            return 'Matrix{0}'.format(self.shape)
+        symbol = ELEMENTWISE_SYMBOLS.get(self.operation, '@')
+        return '({0})'.format(
+            ' {0} '.format(symbol).join(map(repr, self.operands)),
+        )
+
+    def evaluate(self) -> Any:
+        return Evaluator().evaluate(self)
+
+    @staticmethod
+    def _elementwise(
+        operation: str, left: 'LazyMatrix', right: 'LazyMatrix',
+    ) -> 'LazyMatrix':
+        _check_shapes(left.shape == right.shape, left, right)
+        return LazyMatrix(operation, (left, right), left.shape)
+
+    @staticmethod
+    def _matmul(left: 'LazyMatrix', right: 'LazyMatrix') -> 'LazyMatrix':
+        _check_shapes(left.shape[1] == right.shape[0], left, right)
+        return LazyMatrix(
+            'matmul', (left, right), (left.shape[0], right.shape[1]),
+        )
+
+
+class Evaluator(object):
+    def __init__(self) -> None:
+        self._results: dict[NodeKey, Any] = {}
+
+    def evaluate(self, node: LazyMatrix) -> Any:
+        result = self._results.get(node.key)
+        if result is not None:
+            return result
+
+        if node.matrix is not None:
+            result = node.matrix
+        elif node.operation == 'matmul':
+            result = self._evaluate_chain(get_chain(node))
+        else:
+            result = self._evaluate_fused(node)
+
+        self._results[node.key] = result
+        return result
+
+    def _evaluate_chain(self, factors: list[LazyMatrix]) -> Any:
+        matrices = [self.evaluate(factor) for factor in factors]
+        dims = [matrices[0].shape[0], *[m.shape[1] for m in matrices]]
+        splits = get_chain_order(dims)
+
+        def multiply(i: int, j: int) -> Any:
+            if i == j:
+                return matrices[i]
+            k = splits[i][j]
+            return multiply(i, k) @ multiply(k + 1, j)
+
+        return multiply(0, len(matrices) - 1)
+
+    def _evaluate_fused(self, node: LazyMatrix) -> Any:
+        arguments: dict[NodeKey, int] = {}
+        inputs: list[LazyMatrix] = []
+
+        def build_source(current: LazyMatrix, depth: int) -> str:
+            if (
+                current.operation in ELEMENTWISE_SYMBOLS
+                and depth < MAX_FUSED_DEPTH
+            ):
+                symbol = ' {0} '.format(ELEMENTWISE_SYMBOLS[current.operation])
+                return '({0})'.format(
+                    symbol.join(
+                        build_source(term, depth + 1)
+                        for term in get_terms(current)
+                    ),
+                )
+            if current.key not in arguments:
+                arguments[current.key] = len(inputs)
+                inputs.append(current)
+            return 'x{0}'.format(arguments[current.key])
+
+        source = build_source(node, 0)
+        matrices = [self.evaluate(current) for current in inputs]
+        typecodes = {matrix.typecode for matrix in matrices}
+        expression = compile_expression(source, len(matrices))
+        output = kernels.with_float_fallback(
+            lambda typecode: array(
+                typecode,
+                map(expression, *[matrix.data for matrix in matrices]),
+            ),
+            'd' if 'd' in typecodes else 'q',
+        )
+        return type(matrices[0]).from_buffer(output, node.shape)
+
+
+def get_terms(node: LazyMatrix) -> list[LazyMatrix]:
+    # Left-nested chains of one operation are written without nesting,
+    # the expression keeps the left to right evaluation order
+    terms = []
+    current = node
+    while current.operation == node.operation:
+        left, right = current.operands
+        terms.append(right)
+        current = left
+    terms.append(current)
+    return terms[::-1]
+
+
+def get_chain(node: LazyMatrix) -> list[LazyMatrix]:
+    if node.operation != 'matmul':
+        return [node]
+    left, right = node.operands
+    return get_chain(left) + get_chain(right)
+
+
+def get_chain_order(dims: list[int]) -> list[list[int]]:
+    n_matrices = len(dims) - 1
+    costs = [[0] * n_matrices for _ in range(n_matrices)]
+    splits = [[0] * n_matrices for _ in range(n_matrices)]
+    for length in range(2, n_matrices + 1):
+        for i in range(n_matrices - length + 1):
+            j = i + length - 1
+            costs[i][j] = -1
+            for k in range(i, j):
+                cost = (
+                    costs[i][k]
+                    + costs[k + 1][j]
+                    + dims[i] * dims[k + 1] * dims[j + 1]
+                )
+                if costs[i][j] < 0 or cost < costs[i][j]:
+                    costs[i][j] = cost
+                    splits[i][j] = k
+    return splits
+
+
+@functools.lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_expression(source: str, n_arguments: int) -> Callable[..., Any]:
+    arguments = ', '.join('x{0}'.format(idx) for idx in range(n_arguments))
+    return eval('lambda {0}: {1}'.format(arguments, source))
+
+
+def _wrap(value: Any) -> LazyMatrix:
+    if isinstance(value, LazyMatrix):
+        return value
+    return LazyMatrix.leaf(value)
+
+
+def _check_shapes(
+    check_result: bool, left: LazyMatrix, right: LazyMatrix,
+) -> None:
+    if not check_result:
+        raise ValueError(
+            'operands could not be broadcast together with shapes {0} {1}'.format(
+                left.shape, right.shape,
+            ),
+        )
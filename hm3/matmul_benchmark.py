@@ -0,0 +1,86 @@
+import argparse
+import os
+import time
+from typing import Callable
+
+import numpy as np
+
+from cache import cache_scope
+from matrix import ArrayLike, Matrix
+
+SIZES = (16, 32, 64, 128, 256, 512)
+NAIVE_MAX_SIZE = 128
+REPEAT = 3
+
+
+def measure(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_size(size: int, cutoff: int) -> dict[str, float | None]:
+    data1 = np.random.rand(size, size).tolist()
+    data2 = np.random.rand(size, size).tolist()
+    m1, m2 = Matrix(data1), Matrix(data2)
+    a1, a2 = ArrayLike(data1), ArrayLike(data2)
+
+    Matrix.strassen_cutoff = cutoff
+    timings: dict[str, float | None] = {}
+    with cache_scope(None):
+        for method in ('naive', 'blocked', 'strassen'):
+            if method == 'naive' and size > NAIVE_MAX_SIZE:
+                timings[method] = None
+                continue
+            timings[method] = measure(
+                lambda method=method: m1.matmul(m2, method),
+            )
+    timings['ArrayLike'] = measure(lambda: a1 @ a2)
+    return timings
+
+
+def format_timing(timing: float | None) -> str:
+    if timing is None:
+        return '-'.rjust(10)
+    return '{0:.5f}'.format(timing).rjust(10)
+
+
+def main(sizes: list[int], cutoff: int, output_path: str) -> None:
+    columns = ['naive', 'blocked', 'strassen', 'ArrayLike']
+    lines = [
+        'strassen cutoff={0}'.format(cutoff),
+        ' '.join(['size'.rjust(6), *[c.rjust(10) for c in columns]]),
+    ]
+    crossover = None
+    for size in sizes:
+        timings = benchmark_size(size, cutoff)
+        lines.append(
+            ' '.join(
+                [str(size).rjust(6), *map(format_timing, timings.values())],
+            ),
+        )
+        strassen_wins = timings['strassen'] < timings['blocked']
+        if crossover is None and strassen_wins and size > cutoff:
+            crossover = size
+    lines.append('strassen beats blocked from size: {0}'.format(crossover))
+
+    with open(output_path, 'w') as output_file:
+        output_file.write('\n'.join(lines))
+    print('\n'.join(lines))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--cutoff', type=int, default=Matrix.strassen_cutoff)
+    parser.add_argument(
+        '--output-path',
+        default=os.path.join('artifacts', 'matmul_benchmark.txt'),
+    )
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    main(args.sizes, args.cutoff, args.output_path)
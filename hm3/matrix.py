@@ -1,19 +1,42 @@
-import copy
+import functools
+import itertools
+import math
+import mmap
 import numbers
+import operator
 import os
-from typing import Any, Iterable
+from array import array
+from typing import Any, BinaryIO, Callable, Iterable
 
 import numpy as np
 
+import kernels
+import storage
+from cache import get_cache
+from collision import find_collisions
+from lazy import LazyMatrix
+from parallel import MatrixPool
+
+MMAP_ACCESS = {
+    None: None,
+    'r': mmap.ACCESS_READ,
+    'r+': mmap.ACCESS_WRITE,
+    'c': mmap.ACCESS_COPY,
+}
+
 
 class HashMixin(object):
+    __slots__ = ()
+
     def __hash__(self) -> int:
         # The remainder of dividing the sum of the matrix elements
         # by a prime number
-        return sum([sum(row) for row in self.value]) % 47
+        return int(sum([sum(row) for row in self.value]) % 47)
 
 
 class RepresentationMixin(object):
+    __slots__ = ()
+
     def __str__(self) -> str:
         row_strings = [
             self.row_to_string(row) for row in self.value
@@ -30,12 +53,38 @@ class RepresentationMixin(object):
 
 
 class IOMixin(object):
+    __slots__ = ()
+
     def to_txt(self, output_path: str) -> None:
         with open(output_path, 'w') as output_file:
-            output_file.write(str(self))
+            for idx, row in enumerate(self.value):
+                if idx:
+                    output_file.write('\n')
+                output_file.write(self.row_to_string(row))
+
+    def to_file(self, output_path: str) -> None:
+        with open(output_path, 'wb') as output_file:
+            storage.write_header(output_file, self.dtype_str, self.shape)
+            self._write_payload(output_file)
+
+    @classmethod
+    def from_file(cls, input_path: str, mmap_mode: str | None = None) -> Any:
+        if mmap_mode not in MMAP_ACCESS:
+            raise ValueError(
+                'mmap_mode must be one of {0}'.format(list(MMAP_ACCESS)),
+            )
+        file_mode = 'r+b' if mmap_mode == 'r+' else 'rb'
+        with open(input_path, file_mode) as input_file:
+            dtype, shape, offset = storage.read_header(input_file)
+            input_file.seek(offset)
+            return cls._read_payload(
+                input_file, dtype, shape, offset, mmap_mode,
+            )
 
 
 class ValueMixin(object):
+    __slots__ = ('_value',)
+
     @property
     def value(self) -> Any:
         return self._value
@@ -49,68 +98,231 @@ class ValueMixin(object):
 
 
 class Matrix(HashMixin, RepresentationMixin, IOMixin, ValueMixin):
-    _cache: dict[tuple[int, int], 'Matrix'] = {}
+    __slots__ = ('_shape',)
 
-    def __init__(self, value: list[list[float]]) -> None:
+    matmul_method: str = 'auto'
+    numpy_threshold: int | None = kernels.NUMPY_THRESHOLD
+    strassen_cutoff: int = kernels.STRASSEN_CUTOFF
+    pool: MatrixPool | None = None
+    cached_operations: frozenset[str] = frozenset({'add', 'mul', 'matmul'})
+
+    def __init__(self, value: Iterable[Iterable[float]]) -> None:
         self.value = value
 
+    @classmethod
+    def from_buffer(
+        cls,
+        data: array | memoryview,
+        shape: tuple[int, int],
+        *,
+        copy: bool = False,
+    ) -> 'Matrix':
+        if len(data) != shape[0] * shape[1]:
+            raise ValueError(
+                'cannot reshape buffer of size {0} into shape {1}'.format(
+                    len(data), shape,
+                ),
+            )
+        matrix = cls.__new__(cls)
+        if copy:
+            data = array(kernels.get_typecode(data), data)
+        matrix._value = data
+        matrix._shape = shape
+        return matrix
+
     def __add__(self, other: 'Matrix') -> 'Matrix':
+        if not isinstance(other, Matrix):
+            return NotImplemented
         self._check_shapes(other, 'add')
+        return self._apply_cached('add', other, self._add)
 
-        output = self._get_output_matrix(self.shape)
+    def __mul__(self, other: 'Matrix') -> 'Matrix':
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        self._check_shapes(other, 'mul')
+        return self._apply_cached('mul', other, self._mul)
 
-        for i in range(self.shape[0]):
-            for j in range(self.shape[1]):
-                output[i][j] = self.value[i][j] + other.value[i][j]
+    def __matmul__(self, other: 'Matrix') -> 'Matrix':
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        return self.matmul(other)
 
-        return Matrix(output)
+    def matmul(self, other: 'Matrix', method: str | None = None) -> 'Matrix':
+        self._check_shapes(other, 'matmul')
+        if method is None:
+            method = self.matmul_method
+        return self._apply_cached(
+            'matmul',
+            other,
+            functools.partial(self._matmul, method=method),
+            variant=method,
+        )
 
-    def __mul__(self, other: 'Matrix') -> 'Matrix':
-        self._check_shapes(other, 'mul')
+    @property
+    def value(self) -> list[memoryview]:
+        return [self.get_row(i) for i in range(self.shape[0])]
+
+    @value.setter
+    def value(self, value: Iterable[Iterable[float]]) -> None:
+        rows = [list(row) for row in value]
+        n_columns = len(rows[0])
+        if any(len(row) != n_columns for row in rows):
+            raise ValueError('all rows must have the same length')
+        self._value = self._preprocess(itertools.chain.from_iterable(rows))
+        self._shape = (len(rows), n_columns)
 
-        output = self._get_output_matrix(self.shape)
+    @property
+    def data(self) -> array | memoryview:
+        return self._value
 
-        for i in range(self.shape[0]):
-            for j in range(self.shape[1]):
-                output[i][j] = self.value[i][j] * other.value[i][j]
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self._shape
 
-        return Matrix(output)
+    @property
+    def typecode(self) -> str:
+        return kernels.get_typecode(self._value)
 
-    def __matmul__(self, other: 'Matrix') -> 'Matrix':
-        self._check_shapes(other, 'matmul')
+    @property
+    def dtype_str(self) -> str:
+        return storage.typecode_to_dtype(self.typecode)
 
-        cache_key = (hash(self), hash(other))
-        cached_output = self._cache.get(cache_key)
-        if cached_output is not None:
-            return cached_output
+    def lazy(self) -> LazyMatrix:
+        return LazyMatrix.leaf(self)
 
-        output = self._get_output_matrix((self.shape[0], other.shape[1]))
+    def copy(self) -> 'Matrix':
+        return Matrix.from_buffer(self._value, self.shape, copy=True)
 
-        for i in range(self.shape[0]):
-            for j in range(self.shape[1]):
-                pairs = zip(self.get_row(i), other.get_column(j))
-                output[i][j] = sum((p[0] * p[1] for p in pairs))
+    def get_row(self, idx: int) -> memoryview:
+        start = idx * self.shape[1]
+        return memoryview(self._value)[start:start + self.shape[1]]
 
-        self._cache[cache_key] = Matrix(output)
+    def get_column(self, idx: int) -> memoryview:
+        return memoryview(self._value)[idx::self.shape[1]]
 
-        return Matrix(output)
+    def _add(self, other: 'Matrix') -> 'Matrix':
+        return self._elementwise('add', other)
 
-    @property
-    def shape(self) -> tuple[int, int]:
-        return len(self.value), len(self.value[0])
+    def _mul(self, other: 'Matrix') -> 'Matrix':
+        return self._elementwise('mul', other)
+
+    def _elementwise(self, operation: str, other: 'Matrix') -> 'Matrix':
+        output = kernels.with_float_fallback(
+            functools.partial(self._compute_elementwise, operation, other),
+            self._get_typecode(other),
+        )
+        return Matrix.from_buffer(output, self.shape)
+
+    def _compute_elementwise(
+        self, operation: str, other: 'Matrix', typecode: str,
+    ) -> array:
+        if self.pool is not None and self.pool.accepts_elementwise(self.shape):
+            return self.pool.elementwise(
+                operation, self._value, other._value, typecode,
+            )
+        return array(
+            typecode,
+            map(getattr(operator, operation), self._value, other._value),
+        )
+
+    def _matmul(self, other: 'Matrix', method: str) -> 'Matrix':
+        method = kernels.resolve_method(
+            method,
+            self.shape,
+            other.shape,
+            self.numpy_threshold,
+            operands=(self._value, other._value),
+        )
+        output = kernels.with_float_fallback(
+            functools.partial(self._compute_matmul, other, method),
+            self._get_typecode(other),
+        )
+        return Matrix.from_buffer(output, (self.shape[0], other.shape[1]))
+
+    def _compute_matmul(
+        self, other: 'Matrix', method: str, typecode: str,
+    ) -> array:
+        use_pool = (
+            method == 'blocked'
+            and self.pool is not None
+            and self.pool.accepts_matmul(self.shape, other.shape)
+        )
+        if use_pool:
+            return self.pool.matmul(
+                self._value, other._value, self.shape, other.shape, typecode,
+            )
+        return kernels.matmul(
+            self._value,
+            other._value,
+            self.shape,
+            other.shape,
+            typecode,
+            method=method,
+            strassen_cutoff=self.strassen_cutoff,
+        )
 
-    def get_row(self, idx: int) -> list[float]:
-        return self.value[idx]
+    def _apply_cached(
+        self,
+        operation: str,
+        other: 'Matrix',
+        compute: Callable[['Matrix'], 'Matrix'],
+        variant: str = '',
+    ) -> 'Matrix':
+        result_cache = get_cache()
+        if result_cache is None or operation not in self.cached_operations:
+            return compute(other)
+
+        # Different kernels may round float results differently
+        cache_operation = '{0}:{1}'.format(operation, variant)
+        cached_output = result_cache.lookup(cache_operation, self, other)
+        if cached_output is not None:
+            return cached_output
 
-    def get_column(self, idx: int) -> list[float]:
-        return [row[idx] for row in self.value]
+        output = compute(other)
+        result_cache.store(cache_operation, self, other, output)
 
-    def _get_output_matrix(self, shape: tuple[int, int]) -> list[list[float]]:
-        output = []
-        for _ in range(shape[0]):
-            output.append([float(0)] * shape[1])
         return output
 
+    def _write_payload(self, output_file: BinaryIO) -> None:
+        output_file.write(self._value)
+
+    @classmethod
+    def _read_payload(
+        cls,
+        input_file: BinaryIO,
+        dtype: str,
+        shape: tuple[int, ...],
+        offset: int,
+        mmap_mode: str | None,
+    ) -> 'Matrix':
+        if len(shape) != 2:
+            raise ValueError(
+                'expected a 2d matrix, got shape {0}'.format(shape),
+            )
+        typecode, byteswap = storage.dtype_to_typecode(dtype)
+        size = math.prod(shape)
+
+        if mmap_mode is None or size == 0:
+            data = array(typecode)
+            data.fromfile(input_file, size)
+            if byteswap:
+                data.byteswap()
+            return cls.from_buffer(data, shape)
+
+        if byteswap:
+            raise ValueError('cannot memory-map data with foreign byte order')
+        n_bytes = offset + size * array(typecode).itemsize
+        mapped = mmap.mmap(
+            input_file.fileno(), n_bytes, access=MMAP_ACCESS[mmap_mode],
+        )
+        return cls.from_buffer(
+            memoryview(mapped)[offset:n_bytes].cast(typecode), shape,
+        )
+
+    def _get_typecode(self, other: 'Matrix') -> str:
+        typecodes = {self.typecode, other.typecode}
+        return 'd' if 'd' in typecodes else 'q'
+
     def _check_shapes(self, other: 'Matrix', operation: str) -> None:
         if operation == 'matmul':
             check_result = self.shape[1] == other.shape[0]
@@ -124,8 +336,13 @@ class Matrix(HashMixin, RepresentationMixin, IOMixin, ValueMixin):
                 ),
             )
 
-    def _preprocess(self, value: list[list[float]]) -> list[list[float]]:
-        return copy.deepcopy(value)
+    def _preprocess(self, value: Iterable[float]) -> array:
+        values = list(value)
+        try:
+            return array('q', values)
+        except (TypeError, OverflowError):
+            # Floats and integers outside int64, see with_float_fallback
+            return array('d', values)
 
 
 class ArrayLike(
@@ -134,6 +351,8 @@ class ArrayLike(
     IOMixin,
     ValueMixin,
 ):
+    __slots__ = ()
+
     _HANDLED_TYPES = (np.ndarray, numbers.Number)
 
     def __init__(self, value: int | float | Iterable | np.ndarray) -> None:
@@ -153,12 +372,89 @@ class ArrayLike(
             )
         result = getattr(ufunc, method)(*inputs, **kwargs)
 
-        if type(result) is tuple:
-            return tuple(type(self)(x) for x in result)
-        elif method == 'at':
+        if method == 'at':
             return None
-        else:
-            return type(self)(result)
+        if out:
+            # Results were written in place, hand back the same wrappers
+            return out[0] if len(out) == 1 else out
+        if type(result) is tuple:
+            return tuple(self._wrap(x) for x in result)
+        return self._wrap(result)
+
+    def __array_function__(self, func, types, args, kwargs):
+        for t in types:
+            if not issubclass(t, (np.ndarray, ArrayLike)):
+                return NotImplemented
+        result = func(*_unwrap(args), **_unwrap(kwargs))
+        return _wrap_arrays(result, type(self))
+
+    def __array__(
+        self, dtype: np.dtype | None = None, copy: bool | None = None,
+    ) -> np.ndarray:
+        if copy:
+            return np.array(self.value, dtype=dtype, copy=True)
+        if dtype is None:
+            return self.value
+        return self.value.astype(dtype, copy=False)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        # Used from Python 3.12 (PEP 688), older versions go through numpy
+        return memoryview(self.value)
+
+    def __getitem__(self, key: Any) -> 'ArrayLike':
+        return self._wrap(self.value[key])
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        if isinstance(value, ArrayLike):
+            value = value.value
+        self.value[key] = value
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.value.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.value.dtype
+
+    @property
+    def dtype_str(self) -> str:
+        return self.value.dtype.str
+
+    def _write_payload(self, output_file: BinaryIO) -> None:
+        np.ascontiguousarray(self.value).tofile(output_file)
+
+    @classmethod
+    def _read_payload(
+        cls,
+        input_file: BinaryIO,
+        dtype: str,
+        shape: tuple[int, ...],
+        offset: int,
+        mmap_mode: str | None,
+    ) -> 'ArrayLike':
+        if mmap_mode is None:
+            value = np.fromfile(
+                input_file, dtype=dtype, count=math.prod(shape),
+            )
+            return cls._wrap(value.reshape(shape))
+        return cls._wrap(
+            np.memmap(
+                input_file, dtype=dtype, mode=mmap_mode,
+                offset=offset, shape=shape,
+            ),
+        )
+
+    @classmethod
+    def _wrap(cls, value: Any) -> 'ArrayLike':
+        wrapped = cls.__new__(cls)
+        if not isinstance(value, np.ndarray):
+            value = np.asarray(value)
+        wrapped._value = value
+        return wrapped
 
     def _preprocess(
         self, value: int | float | Iterable | np.ndarray,
@@ -166,23 +462,41 @@ class ArrayLike(
         return np.asarray(value)
 
 
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, ArrayLike):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(x) for x in value)
+    if isinstance(value, dict):
+        return {key: _unwrap(x) for key, x in value.items()}
+    return value
+
+
+def _wrap_arrays(value: Any, cls: type[ArrayLike]) -> Any:
+    if isinstance(value, np.ndarray):
+        return cls._wrap(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_wrap_arrays(x, cls) for x in value)
+    return value
+
+
 def generate_data(shape: tuple[int, int]) -> list[list[float]]:
     return np.random.randint(0, 10, (shape)).tolist()
 
 
 def matrix_equality(matrix1: Matrix, matrix2: Matrix) -> bool:
-    for i in range(matrix1.shape[0]):
-        for j in range(matrix1.shape[1]):
-            if matrix1.value[i][j] != matrix2.value[i][j]:
-                return False
-    return True
+    # Flat buffers are compared at once, rows of value are views built on
+    # every access
+    return (
+        matrix1.shape == matrix2.shape
+        and matrix1.typecode == matrix2.typecode
+        and matrix1.data == matrix2.data
+    )
 
 
 def check_collision(a: Matrix, b: Matrix, c: Matrix, d: Matrix) -> bool:
     ab = a @ b
-    Matrix._cache = {}
     cd = c @ d
-    Matrix._cache = {}
     conditions = [
         hash(a) == hash(c),
         not matrix_equality(a, c),
@@ -230,33 +544,26 @@ def medium() -> None:
 def hard() -> None:
     output_dir = os.path.join('artifacts', 'hard')
 
-    while True:
-        a = Matrix(generate_data((2, 2)))
-        b = Matrix(generate_data((2, 2)))
-        c = Matrix(generate_data((2, 2)))
-        d = Matrix(b.value)
-
-        if check_collision(a, b, c, d):
-            ab = a @ b
-            Matrix._cache = {}
-            cd = c @ d
-            Matrix._cache = {}
-
-            filenames = [
-                'A.txt', 'B.txt', 'C.txt', 'D.txt', 'AB.txt', 'CD.txt',
-            ]
-            filepaths = [
-                os.path.join(output_dir, filename) for filename in filenames
-            ]
-            matrices = [a, b, c, d, ab, cd]
-            for matrix, output_path in zip(matrices, filepaths):
-                matrix.to_txt(output_path)
-
-            with open(os.path.join(output_dir, 'hash.txt'), 'w') as hash_file:
-                hash_file.write('Hash AB: {0}\n'.format(hash(ab)))
-                hash_file.write('Hash CD: {0}\n'.format(hash(cd)))
-
-            return
+    result = find_collisions((2, 2), seed=np.random.randint(2 ** 31))
+    a, b, c, d = [
+        Matrix(value.tolist()) for value in result.collisions[0]
+    ]
+    ab = a @ b
+    cd = c @ d
+
+    filenames = [
+        'A.txt', 'B.txt', 'C.txt', 'D.txt', 'AB.txt', 'CD.txt',
+    ]
+    filepaths = [
+        os.path.join(output_dir, filename) for filename in filenames
+    ]
+    matrices = [a, b, c, d, ab, cd]
+    for matrix, output_path in zip(matrices, filepaths):
+        matrix.to_txt(output_path)
+
+    with open(os.path.join(output_dir, 'hash.txt'), 'w') as hash_file:
+        hash_file.write('Hash AB: {0}\n'.format(hash(ab)))
+        hash_file.write('Hash CD: {0}\n'.format(hash(cd)))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,238 @@
+import itertools
+import operator
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import kernels
+
+MATMUL_THRESHOLD = 48 ** 3
+ELEMENTWISE_THRESHOLD = 2 ** 22
+CHUNKS_PER_WORKER = 4
+
+_OPERATORS = {'add': operator.add, 'mul': operator.mul}
+
+# Packed columns of the right operand, kept per worker between tasks.
+# Keys are per-call tokens, segment names are reused after unlink
+_packed_columns: dict[int, list[list[Any]]] = {}
+_tokens = itertools.count()
+
+
+class MatrixPool(object):
+    def __init__(
+        self,
+        n_workers: int | None = None,
+        *,
+        matmul_threshold: int = MATMUL_THRESHOLD,
+        elementwise_threshold: int = ELEMENTWISE_THRESHOLD,
+        chunks_per_worker: int = CHUNKS_PER_WORKER,
+    ) -> None:
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.matmul_threshold = matmul_threshold
+        self.elementwise_threshold = elementwise_threshold
+        self.chunks_per_worker = chunks_per_worker
+        self._executor: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> 'MatrixPool':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.n_workers)
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def accepts_matmul(
+        self, shape_a: tuple[int, int], shape_b: tuple[int, int],
+    ) -> bool:
+        n_ops = shape_a[0] * shape_a[1] * shape_b[1]
+        return n_ops >= self.matmul_threshold
+
+    def accepts_elementwise(self, shape: tuple[int, int]) -> bool:
+        return shape[0] * shape[1] >= self.elementwise_threshold
+
+    def matmul(
+        self,
+        a: array,
+        b: array,
+        shape_a: tuple[int, int],
+        shape_b: tuple[int, int],
+        typecode: str,
+    ) -> array:
+        n_rows, n_columns = shape_a[0], shape_b[1]
+        with SharedOperands(a, b, n_rows * n_columns, typecode) as shared:
+            tasks = [
+                self.executor.submit(
+                    matmul_rows,
+                    shared.token,
+                    shared.names,
+                    (
+                        kernels.get_typecode(a),
+                        kernels.get_typecode(b),
+                        typecode,
+                    ),
+                    shape_a,
+                    shape_b,
+                    rows,
+                )
+                for rows in self._split(n_rows)
+            ]
+            for task in tasks:
+                task.result()
+            return shared.get_output()
+
+    def elementwise(
+        self, operation: str, a: array, b: array, typecode: str,
+    ) -> array:
+        with SharedOperands(a, b, len(a), typecode) as shared:
+            tasks = [
+                self.executor.submit(
+                    elementwise_range,
+                    operation,
+                    shared.names,
+                    (
+                        kernels.get_typecode(a),
+                        kernels.get_typecode(b),
+                        typecode,
+                    ),
+                    span,
+                )
+                for span in self._split(len(a))
+            ]
+            for task in tasks:
+                task.result()
+            return shared.get_output()
+
+    def _split(self, size: int) -> list[tuple[int, int]]:
+        if size == 0:
+            return []
+        n_chunks = min(size, self.n_workers * self.chunks_per_worker)
+        bounds = [size * i // n_chunks for i in range(n_chunks + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+
+class SharedOperands(object):
+    def __init__(
+        self, a: array, b: array, n_output: int, typecode: str,
+    ) -> None:
+        self.typecode = typecode
+        self.n_output = n_output
+        self.token = next(_tokens)
+        n_bytes = n_output * array(typecode).itemsize
+        self._segments = [
+            _create_segment(a),
+            _create_segment(b),
+            SharedMemory(create=True, size=max(1, n_bytes)),
+        ]
+
+    def __enter__(self) -> 'SharedOperands':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+
+    @property
+    def names(self) -> tuple[str, str, str]:
+        a, b, output = self._segments
+        return a.name, b.name, output.name
+
+    def get_output(self) -> array:
+        output = array(self.typecode)
+        output.frombytes(
+            self._segments[2].buf[:self.n_output * output.itemsize],
+        )
+        return output
+
+
+def matmul_rows(
+    token: int,
+    names: tuple[str, str, str],
+    typecodes: tuple[str, str, str],
+    shape_a: tuple[int, int],
+    shape_b: tuple[int, int],
+    rows: tuple[int, int],
+) -> None:
+    segments = [SharedMemory(name=name) for name in names]
+    views: list[memoryview] = []
+    try:
+        views = [
+            segment.buf.cast(typecode)
+            for segment, typecode in zip(segments, typecodes)
+        ]
+        a, b, output = views
+        n_inner, n_columns = shape_b
+        columns = _get_packed_columns(token, b, shape_b)
+        for i in range(*rows):
+            row = a[i * n_inner:(i + 1) * n_inner].tolist()
+            values = [kernels.dot(row, column) for column in columns]
+            output[i * n_columns:(i + 1) * n_columns] = array(
+                typecodes[2], values,
+            )
+    finally:
+        _close_segments(segments, views)
+
+
+def elementwise_range(
+    operation: str,
+    names: tuple[str, str, str],
+    typecodes: tuple[str, str, str],
+    span: tuple[int, int],
+) -> None:
+    segments = [SharedMemory(name=name) for name in names]
+    views: list[memoryview] = []
+    try:
+        views = [
+            segment.buf.cast(typecode)
+            for segment, typecode in zip(segments, typecodes)
+        ]
+        a, b, output = views
+        start, stop = span
+        output[start:stop] = array(
+            typecodes[2],
+            map(_OPERATORS[operation], a[start:stop], b[start:stop]),
+        )
+    finally:
+        _close_segments(segments, views)
+
+
+def _close_segments(
+    segments: list[SharedMemory], views: list[memoryview],
+) -> None:
+    # Views are released explicitly, a traceback keeps the locals alive
+    # and closing would fail over the original error
+    for view in views:
+        view.release()
+    for segment in segments:
+        segment.close()
+
+
+def _get_packed_columns(
+    token: int, data: memoryview, shape: tuple[int, int],
+) -> list[list[Any]]:
+    if token not in _packed_columns:
+        _packed_columns.clear()
+        n_inner, n_columns = shape
+        _packed_columns[token] = [
+            data[j:n_inner * n_columns:n_columns].tolist()
+            for j in range(n_columns)
+        ]
+    return _packed_columns[token]
+
+
+def _create_segment(data: array) -> SharedMemory:
+    n_bytes = data.itemsize * len(data)
+    segment = SharedMemory(create=True, size=max(1, n_bytes))
+    segment.buf[:n_bytes] = memoryview(data).cast('B')
+    return segment
@@ -0,0 +1,55 @@
+import struct
+import sys
+from typing import BinaryIO
+
+MAGIC = b'HM3M'
+VERSION = 1
+ALIGNMENT = 64
+
+# magic, version, dtype string (numpy notation, e.g. '<f8'), ndim
+_HEADER = struct.Struct('<4sB8sB')
+_DIMENSION = struct.Struct('<Q')
+
+NATIVE_BYTEORDER = '<' if sys.byteorder == 'little' else '>'
+TYPECODE_DTYPES = {'q': 'i8', 'd': 'f8'}
+DTYPE_TYPECODES = {
+    dtype: typecode for typecode, dtype in TYPECODE_DTYPES.items()
+}
+
+
+def write_header(
+    output_file: BinaryIO, dtype: str, shape: tuple[int, ...],
+) -> int:
+    header = _HEADER.pack(MAGIC, VERSION, dtype.encode(), len(shape))
+    header += b''.join(_DIMENSION.pack(dim) for dim in shape)
+    header += bytes(-len(header) % ALIGNMENT)
+    output_file.write(header)
+    return len(header)
+
+
+def read_header(input_file: BinaryIO) -> tuple[str, tuple[int, ...], int]:
+    magic, version, dtype, ndim = _HEADER.unpack(
+        input_file.read(_HEADER.size),
+    )
+    if magic != MAGIC:
+        raise ValueError('not a matrix file, magic={0!r}'.format(magic))
+    if version != VERSION:
+        raise ValueError('unsupported matrix file version {0}'.format(version))
+    shape = tuple(
+        _DIMENSION.unpack(input_file.read(_DIMENSION.size))[0]
+        for _ in range(ndim)
+    )
+    header_size = _HEADER.size + ndim * _DIMENSION.size
+    header_size += -header_size % ALIGNMENT
+    return dtype.rstrip(b'\x00').decode(), shape, header_size
+
+
+def typecode_to_dtype(typecode: str) -> str:
+    return NATIVE_BYTEORDER + TYPECODE_DTYPES[typecode]
+
+
+def dtype_to_typecode(dtype: str) -> tuple[str, bool]:
+    typecode = DTYPE_TYPECODES.get(dtype[1:])
+    if typecode is None:
+        raise ValueError('unsupported dtype {0}'.format(dtype))
+    return typecode, dtype[0] not in (NATIVE_BYTEORDER, '|', '=')
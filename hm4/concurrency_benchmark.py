@@ -0,0 +1,413 @@
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import Process
+from threading import Thread
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from fib import fib
+from medium import WorkerPool
+
+FIB_N = 10 ** 4
+IO_DELAY = 0.005
+N_TASKS = 16
+REPEAT = 7
+N_WARM_UP = 2
+# Runs whose IQR exceeds this share of the median are marked as noisy
+NOISE_THRESHOLD = 0.1
+EXECUTORS = (
+    'sequential',
+    'thread',
+    'process',
+    'thread-pool',
+    'process-pool',
+    'asyncio',
+)
+FREE_THREADED_INTERPRETERS = ('python3.14t', 'python3.13t')
+
+
+class Workload(NamedTuple):
+    task: Callable[[], Any]
+    async_task: Callable[[], Awaitable[Any]]
+
+
+def cpu_task() -> None:
+    fib(FIB_N)
+
+
+async def cpu_task_async() -> None:
+    fib(FIB_N)
+
+
+def io_task() -> None:
+    time.sleep(IO_DELAY)
+
+
+async def io_task_async() -> None:
+    await asyncio.sleep(IO_DELAY)
+
+
+def mixed_task() -> None:
+    fib(FIB_N // 2)
+    time.sleep(IO_DELAY / 2)
+
+
+async def mixed_task_async() -> None:
+    fib(FIB_N // 2)
+    await asyncio.sleep(IO_DELAY / 2)
+
+
+WORKLOADS = {
+    'cpu': Workload(cpu_task, cpu_task_async),
+    'io': Workload(io_task, io_task_async),
+    'mixed': Workload(mixed_task, mixed_task_async),
+}
+
+
+def is_gil_enabled() -> bool:
+    return getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+def get_python_label() -> str:
+    return '{0}.{1}{2}'.format(
+        sys.version_info.major,
+        sys.version_info.minor,
+        '' if is_gil_enabled() else 't',
+    )
+
+
+def call(task: Callable[[], Any]) -> Any:
+    return task()
+
+
+def run_tasks(task: Callable[[], Any], n_tasks: int) -> None:
+    for _ in range(n_tasks):
+        task()
+
+
+def split_tasks(n_tasks: int, n_workers: int) -> list[int]:
+    return [
+        n_tasks // n_workers + (i < n_tasks % n_workers)
+        for i in range(n_workers)
+    ]
+
+
+def run_workers(
+    worker_type: type[Thread] | type[Process],
+    workload: Workload,
+    n_tasks: int,
+    n_workers: int,
+) -> None:
+    # Same scheme as easy.py: a new thread or process per worker
+    workers = [
+        worker_type(target=run_tasks, args=(workload.task, count))
+        for count in split_tasks(n_tasks, n_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+async def gather_tasks(
+    workload: Workload, n_tasks: int, n_workers: int,
+) -> None:
+    semaphore = asyncio.Semaphore(n_workers)
+
+    async def run_task() -> None:
+        async with semaphore:
+            await workload.async_task()
+
+    await asyncio.gather(*(run_task() for _ in range(n_tasks)))
+
+
+def get_runner(
+    executor: str, workload: Workload, n_tasks: int, pool: WorkerPool | None,
+) -> Callable[[int], None]:
+    if executor == 'sequential':
+        return lambda n_workers: run_tasks(workload.task, n_tasks)
+    if executor == 'thread':
+        return lambda n_workers: run_workers(
+            Thread, workload, n_tasks, n_workers,
+        )
+    if executor == 'process':
+        return lambda n_workers: run_workers(
+            Process, workload, n_tasks, n_workers,
+        )
+    if executor == 'asyncio':
+        return lambda n_workers: asyncio.run(
+            gather_tasks(workload, n_tasks, n_workers),
+        )
+    # Pools are started and warmed up once, runs measure only the tasks
+    return lambda n_workers: list(pool.map(call, [workload.task] * n_tasks))
+
+
+def measure(
+    runner: Callable[[int], None], n_workers: int, repeat: int, n_warm_up: int,
+) -> list[float]:
+    for _ in range(n_warm_up):
+        runner(n_workers)
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        runner(n_workers)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings: list[float]) -> dict[str, Any]:
+    q1, median, q3 = statistics.quantiles(timings, n=4, method='inclusive')
+    return {
+        'median': median,
+        'q1': q1,
+        'q3': q3,
+        'iqr': q3 - q1,
+        'min': min(timings),
+        'max': max(timings),
+        'noisy': q3 - q1 > NOISE_THRESHOLD * median,
+        'timings': timings,
+    }
+
+
+def benchmark(
+    workloads: list[str],
+    executors: list[str],
+    n_workers_range: list[int],
+    n_tasks: int,
+    repeat: int,
+    n_warm_up: int,
+) -> list[dict[str, Any]]:
+    results = []
+    python = get_python_label()
+    for workload_name in workloads:
+        workload = WORKLOADS[workload_name]
+        baseline = None
+        # Sequential goes first, it is the baseline for the speedup
+        for executor in sorted(executors, key=EXECUTORS.index):
+            # Sequential runs do not depend on the number of workers
+            executor_workers = (
+                [1] if executor == 'sequential' else n_workers_range
+            )
+            for n_workers in executor_workers:
+                pool = None
+                if executor.endswith('-pool'):
+                    pool = WorkerPool(
+                        ProcessPoolExecutor if executor == 'process-pool'
+                        else ThreadPoolExecutor,
+                        n_workers,
+                        initializer=None,
+                    )
+                    pool.warm_up()
+                runner = get_runner(executor, workload, n_tasks, pool)
+                try:
+                    summary = summarize(
+                        measure(runner, n_workers, repeat, n_warm_up),
+                    )
+                finally:
+                    if pool is not None:
+                        pool.close()
+                if executor == 'sequential':
+                    baseline = summary['median']
+                speedup = (
+                    baseline / summary['median'] if baseline is not None
+                    else None
+                )
+                results.append(
+                    {
+                        'python': python,
+                        'workload': workload_name,
+                        'executor': executor,
+                        'n_workers': n_workers,
+                        'n_tasks': n_tasks,
+                        'speedup': speedup,
+                        'efficiency': (
+                            speedup / n_workers if speedup is not None
+                            else None
+                        ),
+                        **summary,
+                    },
+                )
+                print(format_row(results[-1]))
+    return results
+
+
+def run_free_threaded(args: list[str]) -> list[dict[str, Any]]:
+    # Free-threaded builds are separate interpreters, the same benchmark
+    # is run under the first one that is installed
+    if not is_gil_enabled():
+        return []
+    for interpreter in FREE_THREADED_INTERPRETERS:
+        path = shutil.which(interpreter)
+        if path is None:
+            continue
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, 'results.json')
+            subprocess.run(
+                [
+                    path,
+                    os.path.abspath(__file__),
+                    *args,
+                    '--json-path',
+                    json_path,
+                    '--table-path',
+                    os.devnull,
+                    '--no-free-threaded',
+                ],
+                check=True,
+            )
+            with open(json_path) as json_file:
+                return json.load(json_file)['results']
+    return []
+
+
+def format_row(result: dict[str, Any]) -> str:
+    return (
+        '{0:<7} {1:<7} {2:<13} {3:>7} {4:>11.2f} {5:>9.2f}{6:1} {7:>8} '
+        '{8:>10}'
+    ).format(
+        result['python'],
+        result['workload'],
+        result['executor'],
+        result['n_workers'],
+        result['median'] * 1e3,
+        result['iqr'] * 1e3,
+        '*' if result['noisy'] else '',
+        format_ratio(result['speedup']),
+        format_ratio(result['efficiency']),
+    )
+
+
+def format_ratio(ratio: float | None) -> str:
+    return '-' if ratio is None else '{0:.2f}'.format(ratio)
+
+
+def get_table(results: list[dict[str, Any]]) -> str:
+    header = (
+        '{0:<7} {1:<7} {2:<13} {3:>7} {4:>11} {5:>10} {6:>8} {7:>10}'
+    ).format(
+        'python',
+        'load',
+        'executor',
+        'workers',
+        'median, ms',
+        'IQR, ms',
+        'speedup',
+        'efficiency',
+    )
+    return '\n'.join(
+        [
+            header,
+            *map(format_row, results),
+            '* IQR above {0:.0%} of the median'.format(NOISE_THRESHOLD),
+        ],
+    )
+
+
+def main(
+    workloads: list[str],
+    executors: list[str],
+    n_workers_range: list[int],
+    n_tasks: int,
+    repeat: int,
+    n_warm_up: int,
+    json_path: str,
+    table_path: str,
+    free_threaded_args: list[str] | None,
+) -> None:
+    if repeat < 2:
+        raise ValueError('At least 2 repeats are needed for quartiles')
+    results = benchmark(
+        workloads, executors, n_workers_range, n_tasks, repeat, n_warm_up,
+    )
+    if free_threaded_args is not None:
+        results.extend(run_free_threaded(free_threaded_args))
+    environment = {
+        'version': sys.version,
+        'gil_enabled': is_gil_enabled(),
+        'cpu_count': os.cpu_count(),
+        'start_method': multiprocessing.get_start_method(),
+        'fib_n': FIB_N,
+        'io_delay': IO_DELAY,
+        'repeat': repeat,
+        'n_warm_up': n_warm_up,
+    }
+    with open(json_path, 'w') as json_file:
+        json.dump(
+            {'environment': environment, 'results': results},
+            json_file,
+            indent=2,
+        )
+    with open(table_path, 'w') as table_file:
+        table_file.write(get_table(results))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--workloads',
+        nargs='+',
+        choices=list(WORKLOADS),
+        default=list(WORKLOADS),
+    )
+    parser.add_argument(
+        '--executors', nargs='+', choices=EXECUTORS, default=list(EXECUTORS),
+    )
+    parser.add_argument(
+        '--n-workers',
+        type=int,
+        nargs='+',
+        default=sorted({1, 2, 4, multiprocessing.cpu_count()}),
+    )
+    parser.add_argument('--n-tasks', type=int, default=N_TASKS)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--n-warm-up', type=int, default=N_WARM_UP)
+    parser.add_argument(
+        '--json-path',
+        default=os.path.join('artifacts', 'concurrency_benchmark.json'),
+    )
+    parser.add_argument(
+        '--table-path',
+        default=os.path.join('artifacts', 'concurrency_benchmark.txt'),
+    )
+    parser.add_argument(
+        '--no-free-threaded',
+        action='store_true',
+        help='Do not rerun under an installed free-threaded interpreter',
+    )
+    args = parser.parse_args()
+
+    main(
+        args.workloads,
+        args.executors,
+        args.n_workers,
+        args.n_tasks,
+        args.repeat,
+        args.n_warm_up,
+        args.json_path,
+        args.table_path,
+        None if args.no_free_threaded else [
+            '--workloads',
+            *args.workloads,
+            '--executors',
+            *args.executors,
+            '--n-workers',
+            *map(str, args.n_workers),
+            '--n-tasks',
+            str(args.n_tasks),
+            '--repeat',
+            str(args.repeat),
+            '--n-warm-up',
+            str(args.n_warm_up),
+        ],
+    )
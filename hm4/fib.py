@@ -1,3 +1,10 @@
+import itertools
+import sys
+from typing import Iterator
+
+DEFAULT_MAX_BYTES = 16 * 1024 ** 2
+
+
 def fib(n: int) -> list[int]:
     if n == 0:
         return []
@@ -9,3 +16,101 @@ def fib(n: int) -> list[int]:
         a, b = a + b, a
         sequence.append(a)
     return sequence
+
+
+def fib_pair(n: int) -> tuple[int, int]:
+    # Fast doubling: F(2k) = F(k)(2F(k+1) - F(k)), F(2k+1) = F(k)^2 + F(k+1)^2
+    if n < 0:
+        raise ValueError('Index must be non-negative, got {0}'.format(n))
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        a, b = a * (2 * b - a), a * a + b * b
+        if bit == '1':
+            a, b = b, a + b
+    return a, b
+
+
+def fib_nth(n: int) -> int:
+    return fib_pair(n)[0]
+
+
+class FibSequence(object):
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._start = 0
+        self._terms = [0, 1]
+        self._n_bytes = sum(map(sys.getsizeof, self._terms))
+
+    def __getitem__(self, key: int | slice) -> int | list[int]:
+        if isinstance(key, slice):
+            if key.stop is None:
+                raise ValueError('Sequence is infinite, slice needs a stop')
+            if min(key.start or 0, key.stop, key.step or 1) < 0:
+                raise ValueError(
+                    'Slice bounds and step must be non-negative, '
+                    'got {0}'.format(key),
+                )
+            start, stop, step = key.indices(key.stop)
+            if start >= self._start:
+                self._extend(start, stop)
+            if start >= self._start:
+                offset = self._start
+                return self._terms[start - offset:stop - offset:step]
+            terms = self.iterate(start, stop)
+            return list(itertools.islice(terms, 0, None, step))
+        if key < self._start:
+            return fib_nth(key)
+        self._extend(key, key + 1)
+        return self._terms[key - self._start]
+
+    def __iter__(self) -> Iterator[int]:
+        return self.iterate()
+
+    def get_range(self, start: int, stop: int) -> list[int]:
+        return self[start:stop]
+
+    def iterate(
+        self, start: int = 0, stop: int | None = None,
+    ) -> Iterator[int]:
+        index = start
+        if index < self._start:
+            # Evicted prefix is regenerated from a single fast doubling step
+            current, following = fib_pair(index)
+            while index < self._start and (stop is None or index < stop):
+                yield current
+                current, following = following, current + following
+                index += 1
+        while stop is None or index < stop:
+            yield self[index]
+            index += 1
+
+    def _extend(self, start: int, stop: int) -> None:
+        terms = self._terms
+        if start > self._start + len(terms):
+            # Window starts past the cache, it is seeded by fast doubling
+            # and the prefix is never generated
+            terms[:] = fib_pair(start)
+            self._start = start
+            self._n_bytes = sum(map(sys.getsizeof, terms))
+        # Budget is checked per term, a long extension never holds more
+        for _ in range(stop - self._start - len(terms)):
+            terms.append(terms[-2] + terms[-1])
+            self._n_bytes += sys.getsizeof(terms[-1])
+            if self._n_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Drop the oldest terms in bulk down to half of the budget,
+        # the last two are always kept to extend the sequence
+        n_evicted = 0
+        while self._n_bytes > self.max_bytes // 2:
+            if len(self._terms) - n_evicted <= 2:
+                break
+            self._n_bytes -= sys.getsizeof(self._terms[n_evicted])
+            n_evicted += 1
+        del self._terms[:n_evicted]
+        self._start += n_evicted
+
+
+# Shared between callers, so prefixes are computed once per process
+sequence = FibSequence()
@@ -1,96 +1,200 @@
+import argparse
 import codecs
 import os
+import threading
 import time
 from datetime import datetime
-from multiprocessing import Lock, Pipe, Process, Queue
+from multiprocessing import Pipe, Process, Queue, util
 from multiprocessing.connection import Connection
+from multiprocessing.queues import Queue as QueueType
+from typing import Any
+
+from ring_buffer import RingBuffer
 
 QUIT_COMMAND = 'quit'
-log_file_lock = Lock()
+TRANSPORTS = ('pipe', 'ring')
+LOG_PATH = 'artifacts/hard.txt'
+LOG_BATCH_SIZE = 1024
+LOG_FLUSH_INTERVAL = 0.1
+
+LogRecord = tuple[str, int, datetime]
+
+
+class LogClient(object):
+    # Records are buffered at the source and sent to the writer in batches
+    def __init__(self, log_queue: Queue) -> None:
+        self.queue = log_queue
+        self._reset()
+        util.register_after_fork(self, LogClient._reset)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {'queue': self.queue}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state['queue'])
+
+    def log(self, message: str) -> None:
+        # PID and time are taken at the source, not when the record is written
+        record = (message, os.getpid(), datetime.now())
+        with self._lock:
+            self._records.append(record)
+            is_full = len(self._records) >= LOG_BATCH_SIZE
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, daemon=True,
+                )
+                self._flusher.start()
+        if is_full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            records, self._records = self._records, []
+        if records:
+            self.queue.put(records)
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._records: list[LogRecord] = []
+        self._flusher: threading.Thread | None = None
+        self._stop = threading.Event()
+        # Queue closes its feeder in a finalizer with priority 10, the last
+        # batch has to be put before that when a process exits
+        util.Finalize(self, LogClient.close, args=(self, ), exitpriority=20)
 
+    def _run_flusher(self) -> None:
+        while not self._stop.wait(LOG_FLUSH_INTERVAL):
+            self.flush()
 
-def log_to_file(message: str, message_time: datetime) -> None:
-    with log_file_lock:
-        with open('artifacts/hard.txt', 'a') as log_file:
-            log_file.write(
-                '{0}, PID={1}, time={2}\n'.format(
-                    message,
-                    os.getpid(),
-                    message_time,
-                ),
-            )
 
+class LogWriter(object):
+    # Single writer: every process sends its records over one queue
+    def __init__(self, log_path: str = LOG_PATH) -> None:
+        self.log_path = log_path
+        self.queue: Queue = Queue()
+        self.client = LogClient(self.queue)
+        self._thread: threading.Thread | None = None
 
-def a_worker(conn: Connection, q: Queue) -> None:
+    def __enter__(self) -> 'LogWriter':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.client.close()
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        with open(self.log_path, 'a') as log_file:
+            while True:
+                records = self.queue.get()
+                if records is None:
+                    break
+                log_file.write(
+                    ''.join(
+                        '{0}, PID={1}, time={2}\n'.format(*record)
+                        for record in records
+                    ),
+                )
+                log_file.flush()
+
+
+def a_worker(
+    conn: Connection | RingBuffer,
+    q: QueueType | RingBuffer,
+    logger: LogClient,
+) -> None:
     while True:
         command = conn.recv()
-        log_to_file(
-            'Received command: {0}'.format(command),
-            datetime.now(),
-        )
+        logger.log('Received command: {0}'.format(command))
         if command == QUIT_COMMAND:
-            log_to_file('Quitting', datetime.now())
+            logger.log('Quitting')
             conn.close()
             q.put(command)
             break
         q.put(command.lower())
-        log_to_file(
-            'Put command: {0}'.format(command),
-            datetime.now(),
-        )
+        logger.log('Put command: {0}'.format(command))
         time.sleep(5)
 
 
-def b_worker(conn: Connection, q: Queue) -> None:
+def b_worker(
+    conn: Connection | RingBuffer,
+    q: QueueType | RingBuffer,
+    logger: LogClient,
+) -> None:
     while True:
         command = q.get()
-        log_to_file(
-            'Got command: {0}'.format(command),
-            datetime.now(),
-        )
+        logger.log('Got command: {0}'.format(command))
         if command == QUIT_COMMAND:
-            log_to_file('Quitting', datetime.now())
+            logger.log('Quitting')
             conn.close()
             break
         encoded_command = codecs.encode(command, 'rot_13')
         conn.send(encoded_command)
-        log_to_file(
-            'Sent command: {0}'.format(encoded_command),
-            datetime.now(),
-        )
+        logger.log('Sent command: {0}'.format(encoded_command))
+
 
+def main(transport: str) -> None:
+    with LogWriter() as log_writer:
+        run(log_writer.client, transport)
 
-def main() -> None:
-    parent_conn_a, child_conn_a = Pipe()
-    parent_conn_b, child_conn_b = Pipe()
-    q: Queue = Queue()
 
-    a = Process(target=a_worker, args=(child_conn_a, q))
-    b = Process(target=b_worker, args=(child_conn_b, q))
+def run(logger: LogClient, transport: str = 'pipe') -> None:
+    parent_conn_a: Connection | RingBuffer
+    parent_conn_b: Connection | RingBuffer
+    q: QueueType | RingBuffer
+    if transport == 'ring':
+        # Every channel here has one sender and one receiver,
+        # so both ends share a single ring
+        parent_conn_a = child_conn_a = RingBuffer()
+        parent_conn_b = child_conn_b = RingBuffer()
+        q = RingBuffer()
+    else:
+        parent_conn_a, child_conn_a = Pipe()
+        parent_conn_b, child_conn_b = Pipe()
+        q = Queue()
+
+    a = Process(target=a_worker, args=(child_conn_a, q, logger))
+    b = Process(target=b_worker, args=(child_conn_b, q, logger))
 
     a.start()
     b.start()
 
     while True:
         command = input()
-        log_to_file(
-            'Input: {0}'.format(command),
-            datetime.now(),
-        )
+        logger.log('Input: {0}'.format(command))
         parent_conn_a.send(command)
         if command == QUIT_COMMAND:
-            log_to_file('Quitting', datetime.now())
+            logger.log('Quitting')
             a.join()
             b.join()
             parent_conn_a.close()
             parent_conn_b.close()
+            q.close()
             break
         encoded_command = parent_conn_b.recv()
-        log_to_file(
-            'Output: {0}'.format(encoded_command),
-            datetime.now(),
-        )
+        logger.log('Output: {0}'.format(encoded_command))
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transport', choices=TRANSPORTS, default='pipe')
+    args = parser.parse_args()
+
+    main(args.transport)
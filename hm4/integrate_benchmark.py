@@ -0,0 +1,134 @@
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+import medium
+
+REPEAT = 5
+N_ITER = 1000
+EXECUTORS = {
+    'process': ProcessPoolExecutor,
+    'thread': ThreadPoolExecutor,
+}
+
+
+def integrate_per_point(
+    f: Callable[..., float],
+    a: float,
+    b: float,
+    executor: type[ProcessPoolExecutor] | type[ThreadPoolExecutor],
+    *,
+    n_jobs: int = 1,
+    n_iter: int = 1000,
+) -> float:
+    # Previous implementation: one task per sample point
+    step = (b - a) / n_iter
+    with executor(max_workers=n_jobs) as pool:
+        steps = pool.map(
+            partial(integrate_step, f=f, a=a, step=step),
+            range(n_iter),
+        )
+    return sum(steps)
+
+
+def integrate_step(
+    i: int, f: Callable[..., float], a: float, step: float,
+) -> float:
+    return f(a + i * step) * step
+
+
+def get_schemes(n_iter: int) -> dict[str, Callable[..., float]]:
+    integrate = medium.integrate.__wrapped__
+    schemes = {
+        'per-point': partial(integrate_per_point, math.cos, n_iter=n_iter),
+        'rectangle': partial(
+            integrate, math.cos, n_iter=n_iter, initializer=None,
+        ),
+        'simpson': partial(
+            integrate,
+            math.cos,
+            n_iter=n_iter,
+            method='simpson',
+            initializer=None,
+        ),
+        'adaptive': partial(
+            integrate, math.cos, method='adaptive', initializer=None,
+        ),
+    }
+    if medium.np is not None:
+        schemes['rectangle-numpy'] = partial(
+            integrate,
+            medium.np.cos,
+            n_iter=n_iter,
+            vectorized=True,
+            initializer=None,
+        )
+    return schemes
+
+
+def measure(scheme: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = scheme(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main(n_jobs_range: list[int], n_iter: int, output_path: str) -> None:
+    lines = []
+    schemes = get_schemes(n_iter)
+    integrate = medium.integrate.__wrapped__
+    for (executor_name, executor), n_jobs in itertools.product(
+        EXECUTORS.items(), n_jobs_range,
+    ):
+        timings = {}
+        for scheme_name, scheme in schemes.items():
+            timings[scheme_name] = measure(
+                scheme, 0, math.pi / 2, executor, n_jobs=n_jobs,
+            )
+        # Same rectangle rule without paying for pool start-up on each call
+        with medium.WorkerPool(executor, n_jobs, initializer=None) as pool:
+            pool.warm_up()
+            timings['reused-pool'] = measure(
+                integrate, math.cos, 0, math.pi / 2, pool, n_iter=n_iter,
+            )
+        for scheme_name, (result, timing) in timings.items():
+            lines.append(
+                'executor={0}, n_jobs={1}, scheme={2}, Δtime={3:.5f}, '
+                'error={4:.2e}'.format(
+                    executor_name,
+                    n_jobs,
+                    scheme_name,
+                    timing,
+                    abs(result - 1),
+                ),
+            )
+            print(lines[-1])
+
+    with open(output_path, 'w') as output_file:
+        output_file.write('\n'.join(lines))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--n-jobs',
+        type=int,
+        nargs='+',
+        default=list(range(1, multiprocessing.cpu_count() * 2 + 1)),
+    )
+    parser.add_argument('--n-iter', type=int, default=N_ITER)
+    parser.add_argument(
+        '--output-path',
+        default=os.path.join('artifacts', 'integrate_benchmark.txt'),
+    )
+    args = parser.parse_args()
+
+    main(args.n_jobs, args.n_iter, args.output_path)
@@ -0,0 +1,97 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from multiprocessing import Lock, Process
+from multiprocessing.synchronize import Lock as LockType
+from typing import Any, Callable
+
+from hard import LogClient, LogWriter
+
+N_PROCESSES = 3
+N_MESSAGES = 10000
+REPEAT = 3
+
+
+def log_to_file_locked(lock: LockType, log_path: str, message: str) -> None:
+    # Previous implementation: global lock, open and append per message
+    with lock:
+        with open(log_path, 'a') as log_file:
+            log_file.write(
+                '{0}, PID={1}, time={2}\n'.format(
+                    message, os.getpid(), datetime.now(),
+                ),
+            )
+
+
+def log_locked(lock: LockType, log_path: str, n_messages: int) -> None:
+    for i in range(n_messages):
+        log_to_file_locked(lock, log_path, 'Message: {0}'.format(i))
+
+
+def log_queued(logger: LogClient, n_messages: int) -> None:
+    for i in range(n_messages):
+        logger.log('Message: {0}'.format(i))
+
+
+def run_processes(target: Callable[..., None], *args: Any) -> None:
+    processes = [
+        Process(target=target, args=args) for _ in range(N_PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def measure_locked(log_path: str, n_messages: int) -> float:
+    start = time.perf_counter()
+    run_processes(log_locked, Lock(), log_path, n_messages)
+    return time.perf_counter() - start
+
+
+def measure_queued(log_path: str, n_messages: int) -> float:
+    start = time.perf_counter()
+    # Timing includes draining the queue to the file
+    with LogWriter(log_path) as log_writer:
+        run_processes(log_queued, log_writer.client, n_messages)
+    return time.perf_counter() - start
+
+
+def main(n_messages: int, output_path: str) -> None:
+    lines = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, 'log.txt')
+        for name, measure in (
+            ('lock', measure_locked), ('queue', measure_queued),
+        ):
+            timing = min(measure(log_path, n_messages) for _ in range(REPEAT))
+            n_lines = sum(1 for _ in open(log_path))
+            os.remove(log_path)
+            lines.append(
+                'logger={0}, processes={1}, messages={2}, Δtime={3:.5f}, '
+                'messages/s={4:.0f}'.format(
+                    name,
+                    N_PROCESSES,
+                    n_lines // REPEAT,
+                    timing,
+                    N_PROCESSES * n_messages / timing,
+                ),
+            )
+            print(lines[-1])
+
+    with open(output_path, 'w') as output_file:
+        output_file.write('\n'.join(lines))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-messages', type=int, default=N_MESSAGES)
+    parser.add_argument(
+        '--output-path',
+        default=os.path.join('artifacts', 'log_benchmark.txt'),
+    )
+    args = parser.parse_args()
+
+    main(args.n_messages, args.output_path)
@@ -1,13 +1,33 @@
+import argparse
 import itertools
 import math
 import multiprocessing
+import time
 from datetime import datetime
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from functools import partial
-from typing import Callable
+from typing import Any, Callable
 
 from tools import log_time
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+METHODS = ('rectangle', 'trapezoid', 'simpson', 'adaptive')
+DEFAULT_TOLERANCE = 1e-10
+MAX_DEPTH = 50
+WARM_UP_DELAY = 0.01
+N_CALLS = 5
+
+Chunk = tuple[float, float, int]
+ExecutorType = type[ProcessPoolExecutor] | type[ThreadPoolExecutor]
+
 
 def init_worker():
     with open('artifacts/medium.txt', 'a') as log_file:
@@ -18,43 +38,219 @@ def init_worker():
         )
 
 
+class WorkerPool(object):
+    def __init__(
+        self,
+        executor: ExecutorType,
+        n_jobs: int = 1,
+        *,
+        start_method: str | None = None,
+        initializer: Callable[[], None] | None = init_worker,
+    ) -> None:
+        if start_method is not None and not issubclass(
+            executor, ProcessPoolExecutor,
+        ):
+            raise ValueError('Start method applies only to process pools')
+        self.executor_type = executor
+        self.n_jobs = n_jobs
+        self.start_method = start_method
+        self.initializer = initializer
+        self._executor: Executor | None = None
+
+    def __repr__(self) -> str:
+        return 'WorkerPool({0}, n_jobs={1})'.format(
+            self.executor_type.__name__, self.n_jobs,
+        )
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def executor(self) -> Executor:
+        # Workers are started on first use and initialized once per lifetime
+        if self._executor is None:
+            kwargs: dict[str, Any] = {
+                'max_workers': self.n_jobs,
+                'initializer': self.initializer,
+            }
+            if self.start_method is not None:
+                kwargs['mp_context'] = multiprocessing.get_context(
+                    self.start_method,
+                )
+            self._executor = self.executor_type(**kwargs)
+        return self._executor
+
+    def warm_up(self) -> None:
+        # Workers are spawned on demand, concurrent tasks start all of them
+        list(self.executor.map(time.sleep, [WARM_UP_DELAY] * self.n_jobs))
+
+    def map(self, func: Callable[..., Any], *iterables: Any) -> Any:
+        return self.executor.map(func, *iterables)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
 @log_time('artifacts/medium.txt')
 def integrate(
-    f: Callable[..., float],
+    f: Callable[..., Any],
     a: float,
     b: float,
-    executor: type[ProcessPoolExecutor] | type[ThreadPoolExecutor],
+    executor: ExecutorType | WorkerPool,
     *,
     n_jobs: int = 1,
     n_iter: int = 1000,
+    method: str = 'rectangle',
+    vectorized: bool = False,
+    tolerance: float = DEFAULT_TOLERANCE,
+    initializer: Callable[[], None] | None = init_worker,
 ) -> float:
+    if method not in METHODS:
+        raise ValueError(
+            'Unknown method {0}, expected one of {1}'.format(method, METHODS),
+        )
+    if vectorized and np is None:
+        raise ValueError('Vectorized evaluation requires numpy')
+    if isinstance(executor, WorkerPool):
+        n_jobs = executor.n_jobs
+    # Every worker integrates one contiguous sub-interval
+    chunks = get_chunks(a, b, n_iter, n_jobs, method)
+    worker = partial(
+        integrate_chunk,
+        f=f,
+        method=method,
+        vectorized=vectorized,
+        tolerance=tolerance / len(chunks),
+    )
+    if isinstance(executor, WorkerPool):
+        return sum(executor.map(worker, chunks))
+    with executor(max_workers=n_jobs, initializer=initializer) as pool:
+        return sum(pool.map(worker, chunks))
+
+
+def get_chunks(
+    a: float, b: float, n_iter: int, n_chunks: int, method: str,
+) -> list[Chunk]:
+    # Simpson panels come in pairs, a chunk must not split a pair
+    unit = 2 if method == 'simpson' else 1
+    if n_iter % unit:
+        raise ValueError(
+            'Simpson rule needs an even n_iter, got {0}'.format(n_iter),
+        )
+    n_units = n_iter // unit
+    n_chunks = max(1, min(n_chunks, n_units))
     step = (b - a) / n_iter
-    with executor(max_workers=n_jobs, initializer=init_worker) as pool:
-        steps = pool.map(
-            partial(integrate_step, f=f, a=a, step=step),
-            range(n_iter),
+    chunks = []
+    start = 0
+    for chunk_idx in range(n_chunks):
+        stop = start + unit * (
+            n_units // n_chunks + (chunk_idx < n_units % n_chunks)
         )
-    return sum(steps)
+        end = b if stop == n_iter else a + stop * step
+        chunks.append((a + start * step, end, stop - start))
+        start = stop
+    return chunks
 
 
-def integrate_step(
-    i: int, f: Callable[..., float], a: float, step: float,
+def integrate_chunk(
+    chunk: Chunk,
+    f: Callable[..., Any],
+    method: str,
+    vectorized: bool,
+    tolerance: float,
 ) -> float:
-    return f(a + i * step) * step
+    a, b, n_iter = chunk
+    if method == 'adaptive':
+        return integrate_adaptive(f, a, b, tolerance)
+    step = (b - a) / n_iter
+    sum_values = np.sum if vectorized else sum
+    if method == 'rectangle':
+        values = evaluate(f, a, step, n_iter, vectorized)
+        return float(sum_values(values) * step)
+    values = evaluate(f, a, step, n_iter + 1, vectorized)
+    if method == 'trapezoid':
+        return float(
+            (sum_values(values) - (values[0] + values[-1]) / 2) * step,
+        )
+    return float(
+        (
+            values[0]
+            + values[-1]
+            + 4 * sum_values(values[1:-1:2])
+            + 2 * sum_values(values[2:-1:2])
+        ) * step / 3,
+    )
 
 
-def main():
+def evaluate(
+    f: Callable[..., Any],
+    start: float,
+    step: float,
+    n_points: int,
+    vectorized: bool,
+) -> Any:
+    if vectorized:
+        return f(start + step * np.arange(n_points))
+    return [f(start + i * step) for i in range(n_points)]
+
+
+def integrate_adaptive(
+    f: Callable[..., float],
+    a: float,
+    b: float,
+    tolerance: float,
+    max_depth: int = MAX_DEPTH,
+) -> float:
+    # Adaptive Simpson, intervals are split until the error estimate fits
+    fa, fm, fb = f(a), f((a + b) / 2), f(b)
+    whole = (b - a) * (fa + 4 * fm + fb) / 6
+    stack = [(a, b, fa, fm, fb, whole, tolerance, max_depth)]
+    result = 0.0
+    while stack:
+        a, b, fa, fm, fb, whole, tolerance, depth = stack.pop()
+        m = (a + b) / 2
+        flm, frm = f((a + m) / 2), f((m + b) / 2)
+        left = (m - a) * (fa + 4 * flm + fm) / 6
+        right = (b - m) * (fm + 4 * frm + fb) / 6
+        delta = left + right - whole
+        if depth == 0 or abs(delta) <= 15 * tolerance:
+            result += left + right + delta / 15
+            continue
+        stack.append((a, m, fa, flm, fm, left, tolerance / 2, depth - 1))
+        stack.append((m, b, fm, frm, fb, right, tolerance / 2, depth - 1))
+    return result
+
+
+def main(start_method: str | None = None, n_calls: int = N_CALLS) -> None:
     executors = [ProcessPoolExecutor, ThreadPoolExecutor]
     n_jobs_range = list(range(1, multiprocessing.cpu_count() * 2 + 1))
     for executor, n_jobs in itertools.product(executors, n_jobs_range):
-        integrate(
-            math.cos,
-            0,
-            math.pi / 2,
+        with WorkerPool(
             executor,
-            n_jobs=n_jobs,
-        )
+            n_jobs,
+            start_method=(
+                start_method if executor is ProcessPoolExecutor else None
+            ),
+        ) as pool:
+            # Spawn and initialization stay out of the timed calls
+            pool.warm_up()
+            for _ in range(n_calls):
+                integrate(math.cos, 0, math.pi / 2, pool)
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--start-method',
+        default=None,
+        choices=multiprocessing.get_all_start_methods(),
+    )
+    parser.add_argument('--n-calls', type=int, default=N_CALLS)
+    args = parser.parse_args()
+
+    main(args.start_method, args.n_calls)
@@ -0,0 +1,360 @@
+import argparse
+import codecs
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import sys
+import threading
+import time
+import traceback
+from functools import partial
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Sequence
+
+from hard import QUIT_COMMAND
+
+QUEUE_SIZE = 16
+BATCH_SIZE = 256
+BATCH_INTERVAL = 0.05
+N_MESSAGES = 10 ** 5
+
+Batch = list[tuple[int, Any]]
+
+
+class Stage(NamedTuple):
+    name: str
+    func: Callable[[Any], Any]
+    n_workers: int = 1
+    # Messages per second for the whole stage, None means unlimited
+    rate: float | None = None
+
+
+class StageError(Exception):
+    # Cause of an error re-raised in the parent, keeps the worker traceback
+    pass
+
+
+class Failure(NamedTuple):
+    stage: str
+    error: BaseException
+    traceback: str
+
+
+class RateLimiter(object):
+    # Token bucket that may go into debt, so a batch waits for all of its
+    # messages at once instead of one by one
+    def __init__(self, rate: float | None) -> None:
+        self.rate = rate
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+
+    def acquire(self, n_tokens: int = 1) -> None:
+        if self.rate is None:
+            return
+        now = time.monotonic()
+        self._tokens = min(
+            1.0, self._tokens + (now - self._updated_at) * self.rate,
+        )
+        self._updated_at = now
+        self._tokens -= n_tokens
+        if self._tokens < 0:
+            time.sleep(-self._tokens / self.rate)
+
+
+def run_stage(stage: Stage, input_queue: Queue, output_queue: Queue) -> None:
+    rate = None if stage.rate is None else stage.rate / stage.n_workers
+    limiter = RateLimiter(rate)
+    while True:
+        batch = input_queue.get()
+        if batch is None:
+            break
+        limiter.acquire(len(batch))
+        output_queue.put(
+            [(index, apply_stage(stage, item)) for index, item in batch],
+        )
+
+
+def apply_stage(stage: Stage, item: Any) -> Any:
+    # A failed item travels downstream in place of its result, so the
+    # worker and the rest of its batch survive
+    if isinstance(item, Failure):
+        return item
+    try:
+        return stage.func(item)
+    except Exception as error:
+        return get_failure(stage.name, error)
+
+
+def get_failure(stage_name: str, error: Exception) -> Failure:
+    # Some exceptions pickle but fail to unpickle on the other side, those
+    # are replaced with their type name and message
+    try:
+        pickle.loads(pickle.dumps(error))
+    except Exception:
+        error = StageError('{0}: {1}'.format(type(error).__name__, error))
+    return Failure(stage_name, error, traceback.format_exc())
+
+
+class Pipeline(object):
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        *,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        batch_interval: float = BATCH_INTERVAL,
+        ordered: bool = True,
+        start_method: str | None = None,
+    ) -> None:
+        if not stages:
+            raise ValueError('Pipeline needs at least one stage')
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.ordered = ordered
+        self.start_method = start_method
+        self._queues: list[Queue] = []
+        self._processes: list[list[BaseProcess]] = []
+        self._results: queue.SimpleQueue = queue.SimpleQueue()
+        self._collector: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._batch: Batch = []
+        self._n_submitted = 0
+        self._flusher: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._cancelled = threading.Event()
+
+    def __repr__(self) -> str:
+        return 'Pipeline({0})'.format(
+            ', '.join(
+                '{0}x{1}'.format(stage.name, stage.n_workers)
+                for stage in self.stages
+            ),
+        )
+
+    def __enter__(self) -> 'Pipeline':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        context = multiprocessing.get_context(self.start_method)
+        # Bounded queues between stages block a stage that runs ahead,
+        # the last one is drained by the collector thread
+        self._queues = [
+            context.Queue(self.queue_size) for _ in self.stages
+        ] + [context.Queue()]
+        for stage, input_queue, output_queue in zip(
+            self.stages, self._queues, self._queues[1:],
+        ):
+            processes = [
+                context.Process(
+                    target=run_stage,
+                    args=(stage, input_queue, output_queue),
+                    daemon=True,
+                )
+                for _ in range(stage.n_workers)
+            ]
+            for process in processes:
+                process.start()
+            self._processes.append(processes)
+        self._collector = threading.Thread(target=self._collect)
+        self._collector.start()
+
+    def submit(self, item: Any) -> None:
+        with self._lock:
+            self._batch.append((self._n_submitted, item))
+            self._n_submitted += 1
+            is_full = len(self._batch) >= self.batch_size
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, daemon=True,
+                )
+                self._flusher.start()
+        if is_full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._batch = self._batch, []
+        if batch:
+            self._queues[0].put(batch)
+
+    def close(self) -> None:
+        if self._collector is None:
+            return
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        # Stages are drained in order: a stage gets its sentinels only
+        # after every worker of the previous one has exited
+        for processes, input_queue in zip(self._processes, self._queues):
+            for _ in processes:
+                input_queue.put(None)
+            for process in processes:
+                process.join()
+        self._queues[-1].put(None)
+        self._collector.join()
+        self._collector = None
+        self._processes = []
+
+    def results(self) -> Iterator[Any]:
+        pending: dict[int, Any] = {}
+        next_index = 0
+        while True:
+            batch = self._results.get()
+            if batch is None:
+                break
+            if isinstance(batch, Failure):
+                get_result(batch)
+            if not self.ordered:
+                yield from (get_result(item) for _, item in batch)
+                continue
+            # Workers of one stage finish batches out of order
+            pending.update(batch)
+            while next_index in pending:
+                yield get_result(pending.pop(next_index))
+                next_index += 1
+
+    def map(self, items: Iterable[Any]) -> Iterator[Any]:
+        # Input is submitted from its own thread, so results stream back
+        # while it is still being read
+        self._cancelled.clear()
+        submitter = threading.Thread(target=self._submit_all, args=(items, ))
+        submitter.start()
+        try:
+            yield from self.results()
+        finally:
+            # Submission stops early when a result raised
+            self._cancelled.set()
+            submitter.join()
+
+    def _submit_all(self, items: Iterable[Any]) -> None:
+        for item in items:
+            if self._cancelled.is_set():
+                break
+            self.submit(item)
+        self.close()
+
+    def _collect(self) -> None:
+        while True:
+            try:
+                batch = self._queues[-1].get()
+            except Exception as error:
+                # The batch is lost, the consumer gets the error instead of
+                # waiting for it forever
+                batch = Failure('collector', error, traceback.format_exc())
+            self._results.put(batch)
+            if batch is None:
+                break
+
+    def _run_flusher(self) -> None:
+        while not self._stop.wait(self.batch_interval):
+            self.flush()
+
+
+def get_result(item: Any) -> Any:
+    if isinstance(item, Failure):
+        raise item.error from StageError(
+            'Stage {0} failed:\n{1}'.format(item.stage, item.traceback),
+        )
+    return item
+
+
+def get_stages(n_workers: int, rate: float | None) -> list[Stage]:
+    # Same chain as hard.py: lowercase, then rot13
+    return [
+        Stage('lower', str.lower, n_workers, rate),
+        Stage('rot13', partial(codecs.encode, encoding='rot_13'), n_workers),
+    ]
+
+
+def read_commands() -> Iterator[str]:
+    for line in sys.stdin:
+        command = line.rstrip('\n')
+        if command == QUIT_COMMAND:
+            break
+        yield command
+
+
+def measure(pipeline: Pipeline, n_messages: int) -> float:
+    start = time.perf_counter()
+    with pipeline:
+        for _ in pipeline.map(
+            'Message: {0}'.format(i) for i in range(n_messages)
+        ):
+            pass
+    return time.perf_counter() - start
+
+
+def benchmark(
+    n_workers_range: list[int],
+    batch_sizes: list[int],
+    n_messages: int,
+    output_path: str,
+) -> None:
+    lines = []
+    for n_workers, batch_size in itertools.product(
+        n_workers_range, batch_sizes,
+    ):
+        pipeline = Pipeline(
+            get_stages(n_workers, None), batch_size=batch_size,
+        )
+        timing = measure(pipeline, n_messages)
+        lines.append(
+            'n_workers={0}, batch_size={1}, messages={2}, Δtime={3:.5f}, '
+            'messages/s={4:.0f}'.format(
+                n_workers,
+                batch_size,
+                n_messages,
+                timing,
+                n_messages / timing,
+            ),
+        )
+        print(lines[-1])
+
+    with open(output_path, 'w') as output_file:
+        output_file.write('\n'.join(lines))
+
+
+def main(n_workers: int, rate: float | None, batch_size: int) -> None:
+    pipeline = Pipeline(get_stages(n_workers, rate), batch_size=batch_size)
+    with pipeline:
+        for command in pipeline.map(read_commands()):
+            print(command, flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--rate', type=float)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        '--benchmark',
+        action='store_true',
+        help='Push generated messages instead of reading stdin',
+    )
+    parser.add_argument('--n-messages', type=int, default=N_MESSAGES)
+    parser.add_argument(
+        '--output-path',
+        default=os.path.join('artifacts', 'pipeline.txt'),
+    )
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(
+            sorted({1, args.n_workers}),
+            [1, args.batch_size],
+            args.n_messages,
+            args.output_path,
+        )
+    else:
+        main(args.n_workers, args.rate, args.batch_size)
@@ -0,0 +1,143 @@
+import argparse
+import itertools
+import os
+import statistics
+import time
+from multiprocessing import Pipe, Process, Queue
+from multiprocessing.connection import Connection
+from typing import Any, Callable
+
+from ring_buffer import RingBuffer
+
+TRANSPORTS = ('pipe', 'queue', 'ring')
+MESSAGE_SIZES = [16, 256, 4096, 65536]
+N_MESSAGES = 10000
+N_ROUND_TRIPS = 1000
+N_WARM_UP = 100
+
+
+def create_channel(transport: str) -> tuple[Any, Any]:
+    if transport == 'pipe':
+        receiver, sender = Pipe(duplex=False)
+        return sender, receiver
+    if transport == 'queue':
+        queue: Any = Queue()
+        return queue, queue
+    ring = RingBuffer()
+    return ring, ring
+
+
+def get_methods(
+    endpoint: Any,
+) -> tuple[Callable[..., Any], Callable[..., Any]]:
+    if isinstance(endpoint, Connection):
+        return endpoint.send, endpoint.recv
+    # Queue and RingBuffer
+    return endpoint.put, endpoint.get
+
+
+def consume(receiver: Any, n_messages: int) -> None:
+    _, recv = get_methods(receiver)
+    for _ in range(n_messages):
+        recv()
+
+
+def echo(receiver: Any, sender: Any, n_messages: int) -> None:
+    _, recv = get_methods(receiver)
+    send, _ = get_methods(sender)
+    for _ in range(n_messages):
+        send(recv())
+
+
+def measure_throughput(
+    transport: str, message_size: int, n_messages: int,
+) -> float:
+    sender, receiver = create_channel(transport)
+    send, _ = get_methods(sender)
+    message = 'x' * message_size
+    process = Process(target=consume, args=(receiver, n_messages))
+    process.start()
+    start = time.perf_counter()
+    for _ in range(n_messages):
+        send(message)
+    process.join()
+    timing = time.perf_counter() - start
+    sender.close()
+    receiver.close()
+    return n_messages / timing
+
+
+def measure_latency(
+    transport: str, message_size: int, n_round_trips: int,
+) -> float:
+    request_sender, request_receiver = create_channel(transport)
+    response_sender, response_receiver = create_channel(transport)
+    send, _ = get_methods(request_sender)
+    _, recv = get_methods(response_receiver)
+    message = 'x' * message_size
+    process = Process(
+        target=echo,
+        args=(request_receiver, response_sender, N_WARM_UP + n_round_trips),
+    )
+    process.start()
+    # Untimed round trips wait for the echo process to start
+    for _ in range(N_WARM_UP):
+        send(message)
+        recv()
+    timings = []
+    for _ in range(n_round_trips):
+        start = time.perf_counter()
+        send(message)
+        recv()
+        timings.append(time.perf_counter() - start)
+    process.join()
+    for endpoint in (
+        request_sender, request_receiver, response_sender, response_receiver,
+    ):
+        endpoint.close()
+    return statistics.quantiles(timings, n=100)[98]
+
+
+def main(
+    message_sizes: list[int],
+    n_messages: int,
+    n_round_trips: int,
+    output_path: str,
+) -> None:
+    lines = []
+    for message_size, transport in itertools.product(
+        message_sizes, TRANSPORTS,
+    ):
+        throughput = measure_throughput(transport, message_size, n_messages)
+        latency = measure_latency(transport, message_size, n_round_trips)
+        lines.append(
+            'transport={0}, message_size={1}, messages/s={2:.0f}, '
+            'p99 round trip={3:.1f}us'.format(
+                transport, message_size, throughput, latency * 1e6,
+            ),
+        )
+        print(lines[-1])
+
+    with open(output_path, 'w') as output_file:
+        output_file.write('\n'.join(lines))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--message-sizes', type=int, nargs='+', default=MESSAGE_SIZES,
+    )
+    parser.add_argument('--n-messages', type=int, default=N_MESSAGES)
+    parser.add_argument('--n-round-trips', type=int, default=N_ROUND_TRIPS)
+    parser.add_argument(
+        '--output-path',
+        default=os.path.join('artifacts', 'ring_benchmark.txt'),
+    )
+    args = parser.parse_args()
+
+    main(
+        args.message_sizes,
+        args.n_messages,
+        args.n_round_trips,
+        args.output_path,
+    )
@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import platform
+import struct
+import time
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Lock
+from typing import Any
+
+DEFAULT_CAPACITY = 1024 ** 2
+# Positions are 8-byte items on separate cache lines, messages follow them
+HEAD_INDEX = 0
+TAIL_INDEX = 8
+DATA_OFFSET = 128
+N_SPINS = 100
+N_YIELDS = 1000
+# Sleeps grow from 1 us up to 2 ** 10 us, about 1 ms
+MAX_BACKOFF_EXPONENT = 10
+# Plain stores keep their order with the payload copy only on x86-64,
+# elsewhere positions are read and written under a lock, which is a barrier
+LOCK_FREE = platform.machine() in ('x86_64', 'AMD64')
+
+MESSAGE_HEADER = struct.Struct('<IB')
+
+
+class RingBuffer(object):
+    # Single producer, single consumer. Head and tail only grow and each is
+    # written by one side, so no lock is needed: the producer publishes head
+    # after the payload is copied, the consumer moves tail after reading.
+    # This relies on aligned 8-byte stores not being reordered with the
+    # payload copy, as on x86-64. Other machines fall back to a lock.
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        *,
+        name: str | None = None,
+        lock: Lock | None = None,
+    ) -> None:
+        if lock is None and not LOCK_FREE:
+            if name is not None:
+                raise ValueError(
+                    'Attaching by name on {0} needs the lock of the '
+                    'buffer'.format(platform.machine()),
+                )
+            lock = multiprocessing.Lock()
+        self.capacity = capacity
+        self._lock = lock
+        if name is None:
+            self._shm = SharedMemory(create=True, size=DATA_OFFSET + capacity)
+            self._owner_pid: int | None = os.getpid()
+        else:
+            self._shm = SharedMemory(name)
+            self._owner_pid = None
+        self._buffer: memoryview | None = self._shm.buf
+        # Item assignment is a single aligned store, struct.pack_into zeroes
+        # the bytes first and the other side could read a position of 0
+        self._positions = self._buffer[:DATA_OFFSET].cast('Q')
+
+    def __repr__(self) -> str:
+        return 'RingBuffer({0}, capacity={1})'.format(
+            self._shm.name, self.capacity,
+        )
+
+    def __enter__(self) -> 'RingBuffer':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        # Exported views have to be released before the block is closed
+        if hasattr(self, '_positions'):
+            self.close()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Spawned processes attach to the same block by name
+        return {
+            'name': self._shm.name,
+            'capacity': self.capacity,
+            'lock': self._lock,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(
+            state['capacity'], name=state['name'], lock=state['lock'],
+        )
+
+    def send(self, message: bytes | str) -> None:
+        is_str = isinstance(message, str)
+        payload = message.encode() if is_str else message
+        size = MESSAGE_HEADER.size + len(payload)
+        if size > self.capacity:
+            raise ValueError(
+                'Message of {0} bytes does not fit into {1} bytes'.format(
+                    len(payload), self.capacity,
+                ),
+            )
+        head = self._load(HEAD_INDEX)
+        n_attempts = 0
+        while head + size - self._load(TAIL_INDEX) > self.capacity:
+            n_attempts = self._backoff(n_attempts)
+        self._write(head, MESSAGE_HEADER.pack(len(payload), is_str))
+        self._write(head + MESSAGE_HEADER.size, payload)
+        self._store(HEAD_INDEX, head + size)
+
+    def recv(self) -> bytes | str:
+        tail = self._load(TAIL_INDEX)
+        n_attempts = 0
+        while self._load(HEAD_INDEX) == tail:
+            n_attempts = self._backoff(n_attempts)
+        length, is_str = MESSAGE_HEADER.unpack(
+            self._read(tail, MESSAGE_HEADER.size),
+        )
+        payload = self._read(tail + MESSAGE_HEADER.size, length)
+        self._store(TAIL_INDEX, tail + MESSAGE_HEADER.size + length)
+        return payload.decode() if is_str else payload
+
+    # Queue-style names, so the buffer replaces either endpoint
+    put = send
+    get = recv
+
+    def poll(self) -> bool:
+        return self._load(HEAD_INDEX) != self._load(TAIL_INDEX)
+
+    def close(self) -> None:
+        if self._buffer is None:
+            return
+        self._positions.release()
+        self._buffer = None
+        self._shm.close()
+        # Forked children inherit the object but never remove the block
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+
+    def _load(self, index: int) -> int:
+        if self._lock is None:
+            return self._positions[index]
+        with self._lock:
+            return self._positions[index]
+
+    def _store(self, index: int, value: int) -> None:
+        if self._lock is None:
+            self._positions[index] = value
+            return
+        with self._lock:
+            self._positions[index] = value
+
+    def _write(self, position: int, data: bytes) -> None:
+        # Slices are temporary, a view kept alive would block closing
+        start = DATA_OFFSET + position % self.capacity
+        size = min(len(data), DATA_OFFSET + self.capacity - start)
+        self._buffer[start:start + size] = data[:size]
+        if size < len(data):
+            self._buffer[DATA_OFFSET:DATA_OFFSET + len(data) - size] = (
+                data[size:]
+            )
+
+    def _read(self, position: int, length: int) -> bytes:
+        start = DATA_OFFSET + position % self.capacity
+        end = DATA_OFFSET + self.capacity
+        if start + length <= end:
+            return bytes(self._buffer[start:start + length])
+        size = end - start
+        return (
+            bytes(self._buffer[start:end])
+            + bytes(self._buffer[DATA_OFFSET:DATA_OFFSET + length - size])
+        )
+
+    def _backoff(self, n_attempts: int) -> int:
+        # Spin briefly, then give up the CPU to the other side, which may
+        # share the core, and only then sleep with exponential backoff
+        if n_attempts >= N_SPINS + N_YIELDS:
+            exponent = min(
+                n_attempts - N_SPINS - N_YIELDS, MAX_BACKOFF_EXPONENT,
+            )
+            time.sleep(1e-6 * 2 ** exponent)
+        elif n_attempts >= N_SPINS:
+            time.sleep(0)
+        return n_attempts + 1
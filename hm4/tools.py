@@ -1,23 +1,233 @@
+import json
+import math
+import os
+import random
+import threading
 import time
 from functools import wraps
+from multiprocessing import util
 from typing import Any, Callable, TypeVar, cast
 
 FuncT = TypeVar('FuncT', bound=Callable[..., Any])
 
+OUTPUTS = ('text', 'jsonl', 'summary')
+FLUSH_INTERVAL = 1.0
+BATCH_SIZE = 1024
+# Spawned children re-import this module and read these variables
+ENVIRONMENT_OPTIONS = {
+    'output': 'LOG_TIME_OUTPUT',
+    'enabled': 'LOG_TIME_ENABLED',
+    'sample_rate': 'LOG_TIME_SAMPLE_RATE',
+}
+
+Record = tuple[str, str, str, str, float, float]
+
+
+class Metric(object):
+    __slots__ = ('count', 'total', 'min', 'max', 'histogram')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.histogram: dict[int, int] = {}
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.min = min(self.min, elapsed)
+        self.max = max(self.max, elapsed)
+        # Bucket k holds latencies below 2 ** k microseconds
+        bucket = int(elapsed * 1e6).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else 0.0,
+            'histogram': {
+                '<{0}us'.format(2 ** bucket): count
+                for bucket, count in sorted(self.histogram.items())
+            },
+        }
+
+
+class MetricsRegistry(object):
+    def __init__(
+        self,
+        output: str = 'text',
+        *,
+        enabled: bool = True,
+        sample_rate: float = 1.0,
+        flush_interval: float = FLUSH_INTERVAL,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        self._set_options(
+            {
+                'output': output,
+                'enabled': enabled,
+                'sample_rate': sample_rate,
+                'flush_interval': flush_interval,
+                'batch_size': batch_size,
+            },
+        )
+        self._reset()
+        # Children get an empty registry and flush it when they exit
+        util.register_after_fork(self, MetricsRegistry._reset)
+
+    def configure(self, **options: Any) -> None:
+        # Only explicit settings are exported, importing the module leaves
+        # the environment untouched
+        self._set_options(options)
+        for name, value in options.items():
+            if name in ENVIRONMENT_OPTIONS:
+                os.environ[ENVIRONMENT_OPTIONS[name]] = str(
+                    int(value) if isinstance(value, bool) else value,
+                )
+
+    def record(
+        self,
+        log_path: str,
+        name: str,
+        args: tuple,
+        kwargs: dict,
+        elapsed: float,
+    ) -> None:
+        with self._lock:
+            metric = self.metrics.get((log_path, name))
+            if metric is None:
+                metric = self.metrics[(log_path, name)] = Metric()
+            metric.add(elapsed)
+            if self.output == 'summary':
+                return
+            # Arguments are snapshotted, records must not keep them alive
+            # or show changes made after the call
+            self._records.append(
+                (
+                    log_path,
+                    name,
+                    repr(args),
+                    repr(kwargs),
+                    elapsed,
+                    time.time(),
+                ),
+            )
+            if len(self._records) >= self.batch_size:
+                self._wake.set()
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, daemon=True,
+                )
+                self._flusher.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            records, self._records = self._records, []
+        lines: dict[str, list[str]] = {}
+        for record in records:
+            lines.setdefault(record[0], []).append(self._format(record))
+        for log_path, log_lines in lines.items():
+            self._write(log_path, log_lines)
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            self._stop.set()
+            self._wake.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        if self.output != 'summary':
+            return
+        with self._lock:
+            metrics, self.metrics = self.metrics, {}
+        lines: dict[str, list[str]] = {}
+        for (log_path, name), metric in metrics.items():
+            lines.setdefault(log_path, []).append(
+                'Func summary: name={0}, PID={1}, metrics={2}'.format(
+                    name, os.getpid(), json.dumps(metric.to_dict()),
+                ),
+            )
+        for log_path, log_lines in lines.items():
+            self._write(log_path, log_lines)
+
+    def _set_options(self, options: dict[str, Any]) -> None:
+        output = options.get('output')
+        if output is not None and output not in OUTPUTS:
+            raise ValueError(
+                'Unknown output {0}, expected one of {1}'.format(
+                    output, OUTPUTS,
+                ),
+            )
+        for name, value in options.items():
+            setattr(self, name, value)
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self.metrics: dict[tuple[str, str], Metric] = {}
+        self._records: list[Record] = []
+        self._flusher: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        # Multiprocessing runs finalizers on exit in the parent and in children
+        util.Finalize(
+            self, MetricsRegistry.close, args=(self, ), exitpriority=10,
+        )
+
+    def _run_flusher(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _format(self, record: Record) -> str:
+        # Lines are built by the flusher, off the timed call path
+        _, name, args, kwargs, elapsed, timestamp = record
+        if self.output == 'jsonl':
+            return json.dumps(
+                {
+                    'name': name,
+                    'args': args,
+                    'kwargs': kwargs,
+                    'time': elapsed,
+                    'timestamp': timestamp,
+                    'pid': os.getpid(),
+                },
+            )
+        return (
+            'Func execution info: name={0}, args={1}, kwargs={2}, '
+            'Δtime={3:.5f}'.format(name, args, kwargs, elapsed)
+        )
+
+    def _write(self, log_path: str, lines: list[str]) -> None:
+        # One append per batch keeps lines of concurrent processes whole
+        with open(log_path, 'a') as log_file:
+            log_file.write('\n'.join(lines) + '\n')
+
+
+registry = MetricsRegistry(
+    os.environ.get('LOG_TIME_OUTPUT', 'text'),
+    enabled=os.environ.get('LOG_TIME_ENABLED', '1') != '0',
+    sample_rate=float(os.environ.get('LOG_TIME_SAMPLE_RATE', '1')),
+)
+
 
 def log_time(log_path: str) -> FuncT:
     def log_time_decorator(func: FuncT) -> FuncT:
         @wraps(func)
         def log_time_wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not registry.enabled or (
+                registry.sample_rate < 1
+                and random.random() >= registry.sample_rate
+            ):
+                return func(*args, **kwargs)
             start = time.perf_counter()
             result = func(*args, **kwargs)
             end = time.perf_counter()
-            with open(log_path, 'a') as log_file:
-                log_file.write(
-                    'Func execution info: name={0}, args={1}, kwargs={2}, Δtime={3:.5f}\n'.format(
-                        func.__name__, args, kwargs, end - start,
-                    ),
-                )
+            registry.record(log_path, func.__name__, args, kwargs, end - start)
             return result
         return cast(FuncT, log_time_wrapper)
     return cast(FuncT, log_time_decorator)